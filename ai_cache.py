@@ -0,0 +1,124 @@
+"""
+Persistent AI response cache - SQLite table of parsed Gemini results
+Keyed by (sorted photo hashes, normalized prompt hash, model name)
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import db
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so cosmetic prompt edits don't defeat the cache"""
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+
+def cache_key(photo_hashes: Iterable[str], prompt: str, model_name: str) -> str:
+    """Stable key for one request"""
+    prompt_hash = hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest()
+    material = json.dumps([sorted(photo_hashes), prompt_hash, model_name])
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class AIResponseCache:
+    """Stores parsed JSON results with TTL and least-recently-used size eviction"""
+
+    def __init__(self, db_path: Union[str, Path], ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Hit/miss counts not yet written; flushed with the next hit or put, so a miss costs no write
+        self._lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0}
+        self._init_db()
+
+    def _init_db(self):
+        db.execute_script(self.db_path, """
+            CREATE TABLE IF NOT EXISTS ai_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                result TEXT,
+                created_at REAL,
+                last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_ai_responses_last_used ON ai_responses(last_used);
+
+            -- Lookups happen in ai_worker processes, so the counts live with the cache
+            CREATE TABLE IF NOT EXISTS ai_cache_stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            ) WITHOUT ROWID;
+        """)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Cached result, or None if missing or expired"""
+        now = time.time()
+        row = db.read_one(
+            self.db_path,
+            "SELECT result FROM ai_responses WHERE key = ? AND created_at > ?",
+            (key, now - self.ttl_seconds)
+        )
+        self._count('hits' if row else 'misses')
+        if not row:
+            return None
+        with db.transaction(self.db_path) as conn:
+            conn.execute("UPDATE ai_responses SET last_used = ? WHERE key = ?", (now, key))
+            self._flush_counts(conn)
+        return json.loads(row[0])
+
+    def put(self, key: str, result: dict, model_name: str = ''):
+        """Store a result, evicting expired and excess entries"""
+        now = time.time()
+        with db.transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ai_responses (key, model, result, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model_name, json.dumps(result), now, now)
+            )
+            self._evict(conn, now)
+            self._flush_counts(conn)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._pending[name] += 1
+
+    def _flush_counts(self, conn):
+        """Add the pending hit/miss counts to ai_cache_stats inside the caller's transaction"""
+        with self._lock:
+            pending = [(name, count) for name, count in self._pending.items() if count]
+            self._pending = dict.fromkeys(self._pending, 0)
+        conn.executemany("""
+            INSERT INTO ai_cache_stats (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+        """, pending)
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM ai_responses WHERE created_at <= ?", (now - self.ttl_seconds,))
+        conn.execute("""
+            DELETE FROM ai_responses WHERE key IN (
+                SELECT key FROM ai_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def clear(self):
+        """Drop every cached response and reset the hit/miss counts"""
+        with db.transaction(self.db_path) as conn:
+            conn.execute("DELETE FROM ai_responses")
+            conn.execute("DELETE FROM ai_cache_stats")
+        with self._lock:
+            self._pending = dict.fromkeys(self._pending, 0)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counts across every process using this cache (other processes' unflushed ones excluded)"""
+        counts = dict(db.read(self.db_path, "SELECT name, value FROM ai_cache_stats"))
+        with self._lock:
+            return {name: counts.get(name, 0) + pending for name, pending in self._pending.items()}
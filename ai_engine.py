@@ -0,0 +1,124 @@
+"""
+Concurrent execution engine for AI requests
+Bounded in-flight requests, per-request timeouts, retries with jittered
+backoff, and results collected in input order
+"""
+
+import heapq
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_TIMEOUT = 90.0
+DEFAULT_RETRIES = 2
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+QUEUED_POLL_SECONDS = 0.5
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def run_concurrent(
+    items: Sequence,
+    fn: Callable[[Any], Any],
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    fallback: Optional[Callable[[Any, Exception], Any]] = None,
+    on_result: Optional[Callable[[int, Any, int], None]] = None,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+) -> List[Any]:
+    """Run fn over items with at most max_in_flight calls at once; returns results in item order
+
+    A call that raises one of retry_on, or runs longer than timeout seconds,
+    is retried up to `retries` times after a jittered backoff. When retries
+    run out, fallback(item, exc) supplies the result (or the error is raised
+    if no fallback is given). on_result(index, result, completed_count) is
+    called from the calling thread as each item finishes, in completion order.
+    """
+    results: List[Any] = [None] * len(items)
+    if not items:
+        return results
+
+    max_in_flight = max(1, max_in_flight)
+    # Ready-to-run queue of (not_before, index, attempt); attempt 0 runs immediately
+    pending = [(0.0, index, 0) for index in range(len(items))]
+    heapq.heapify(pending)
+    # future -> (index, attempt, start time list); the start time is filled in by
+    # the worker thread, so time spent queued behind abandoned calls isn't counted
+    running: Dict[Future, Tuple[int, int, List[float]]] = {}
+    completed = 0
+
+    def timed_call(item: Any, started: List[float]) -> Any:
+        started.append(time.monotonic())
+        return fn(item)
+
+    def deadline(started: List[float]) -> float:
+        return started[0] + timeout if timeout and started else float('inf')
+
+    def finish(index: int, result: Any):
+        nonlocal completed
+        results[index] = result
+        completed += 1
+        if on_result:
+            on_result(index, result, completed)
+
+    def failed(index: int, attempt: int, exc: Exception):
+        if attempt < retries and isinstance(exc, retry_on):
+            heapq.heappush(pending, (time.monotonic() + backoff_delay(attempt), index, attempt + 1))
+        elif fallback is not None:
+            finish(index, fallback(items[index], exc))
+        else:
+            raise exc
+
+    # Timed-out calls cannot be interrupted, only abandoned; extra workers
+    # keep an abandoned call from blocking the next request's slot
+    pool = ThreadPoolExecutor(max_workers=max_in_flight * 2, thread_name_prefix="ai")
+    try:
+        while completed < len(items):
+            now = time.monotonic()
+            while pending and len(running) < max_in_flight and pending[0][0] <= now:
+                _, index, attempt = heapq.heappop(pending)
+                started: List[float] = []
+                future = pool.submit(timed_call, items[index], started)
+                running[future] = (index, attempt, started)
+
+            # Sleep until something finishes, a deadline passes or a retry becomes due.
+            # Calls still waiting for a thread have no deadline yet; poll so one is
+            # noticed soon after they start.
+            wake_times = [deadline(started) for _, _, started in running.values() if started and timeout]
+            if timeout and any(not started for _, _, started in running.values()):
+                wake_times.append(now + min(timeout, QUEUED_POLL_SECONDS))
+            if pending and len(running) < max_in_flight:
+                wake_times.append(pending[0][0])
+            wait_for = max(0.0, min(wake_times) - now) if wake_times else None
+            if running:
+                done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+            else:
+                done = set()
+                time.sleep(wait_for or 0)
+
+            for future in done:
+                index, attempt, _ = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    failed(index, attempt, exc)
+                else:
+                    finish(index, result)
+
+            now = time.monotonic()
+            for future, (index, attempt, started) in list(running.items()):
+                if deadline(started) <= now:
+                    del running[future]
+                    future.cancel()
+                    failed(index, attempt, TimeoutError(f"Request timed out after {timeout:.0f}s"))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return results
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+AI batch worker - claims per-SKU jobs from the job queue, runs them through
+ListingPipeline and stores each listing as soon as it arrives
+
+Started automatically by app.py when a batch is queued (exiting again once
+the queue stays empty), or run by hand for long unattended batches.
+
+Usage: python ai_worker.py [--data-dir data] [--processes 2] [--idle-exit 120]
+"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from ai_engine import DEFAULT_MAX_IN_FLIGHT
+from job_queue import JobQueue, WORKER_STALE_SECONDS, worker_name
+from listing_pipeline import ListingPipeline, load_config
+
+POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = WORKER_STALE_SECONDS / 3
+SPAWNED_IDLE_EXIT = 120.0
+
+
+def batch_config(queue: JobQueue, batch_id: int, data_dir: Path) -> dict:
+    """The batch's stored settings plus the current API key"""
+    config = queue.batch_config(batch_id)
+    config['gemini_api_key'] = os.environ.get('GEMINI_API_KEY') or load_config(data_dir).get('gemini_api_key', '')
+    return config
+
+
+def run_worker(data_dir: Union[str, Path], idle_exit: Optional[float] = None, genai_module=None):
+    """Process jobs until stopped, or until the queue has been empty for idle_exit seconds"""
+    data_dir = Path(data_dir)
+    pipeline = ListingPipeline(data_dir, genai_module)
+    pipeline.init_database()
+    queue = JobQueue(pipeline.feedback_db)
+    name = worker_name()
+
+    # Heartbeats run on their own thread so a slow Gemini call doesn't look like a dead worker
+    stop = threading.Event()
+    queue.heartbeat(name)
+
+    def beat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            queue.heartbeat(name)
+
+    threading.Thread(target=beat, name="heartbeat", daemon=True).start()
+
+    idle_since = time.monotonic()
+    try:
+        while True:
+            # Enough to keep every request slot busy
+            in_flight = load_config(data_dir).get('max_concurrent_requests', DEFAULT_MAX_IN_FLIGHT)
+            jobs = queue.claim(name, max(1, in_flight) * 2)
+            if not jobs:
+                if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                    break
+                time.sleep(POLL_SECONDS)
+                continue
+
+            for batch_id in dict.fromkeys(job[1] for job in jobs):
+                batch = [job for job in jobs if job[1] == batch_id]
+                config = batch_config(queue, batch_id, data_dir)
+                failures = {}
+                pipeline.process_groups(
+                    [(sku, [{'hash': digest} for digest in photos]) for _, _, sku, photos in batch],
+                    config,
+                    on_result=lambda index, result, done: queue.complete(
+                        batch[index][0], result, failures.get(batch[index][2])),
+                    on_error=failures.__setitem__
+                )
+            idle_since = time.monotonic()
+    finally:
+        stop.set()
+        queue.retire(name)
+
+
+def ensure_workers(data_dir: Union[str, Path], processes: int, queue: JobQueue) -> int:
+    """Start worker processes until `processes` are alive; returns how many were started"""
+    missing = max(0, processes - queue.live_workers())
+    data_dir = Path(data_dir).resolve()
+    for _ in range(missing):
+        with open(data_dir / "ai_worker.log", 'a') as log:
+            worker = subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), '--data-dir', str(data_dir),
+                 '--idle-exit', str(SPAWNED_IDLE_EXIT)],
+                cwd=Path(__file__).resolve().parent,
+                stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                # Keeps running if the Streamlit server is stopped mid-batch
+                start_new_session=True,
+            )
+        # Counted as alive straight away, so the next poll doesn't start another one
+        queue.heartbeat(worker_name(worker.pid))
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', type=Path, default=Path("data"))
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--idle-exit', type=float, help="exit after this many seconds without jobs")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(args.data_dir, args.idle_exit)
+        return
+    workers = [multiprocessing.Process(target=run_worker, args=(args.data_dir, args.idle_exit))
+               for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
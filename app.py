@@ -7,17 +7,22 @@ MOBILE-RESPONSIVE & MULTI-USER READY
 
 import streamlit as st
 import json
-import sqlite3
+import uuid
 from pathlib import Path
-import base64
 from datetime import datetime
 import pandas as pd
-from PIL import Image
-import io
-import os
-import google.generativeai as genai
-from typing import Dict, List, Optional, Tuple
-import hashlib
+from typing import List, TextIO
+from image_pipeline import DEFAULT_MODEL_PRESET, MODEL_INPUT_PRESETS
+from photo_store import THUMBNAIL
+from photo_grouping import suggest_groups
+from photo_registry import PhotoRegistry
+from ai_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RETRIES, DEFAULT_TIMEOUT
+from listing_pipeline import ListingPipeline
+from job_queue import JobQueue
+from ai_worker import ensure_workers
+from edit_tracker import EditTracker
+from listing_export import LAYOUTS as EXPORT_LAYOUTS, csv_file, frame_listings
+import db
 
 # Page config - MOBILE OPTIMIZED
 st.set_page_config(
@@ -88,12 +93,9 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'uploaded_photos' not in st.session_state:
-    st.session_state.uploaded_photos = []
-if 'photo_groups' not in st.session_state:
-    st.session_state.photo_groups = {}
-if 'unassigned_photos' not in st.session_state:
-    st.session_state.unassigned_photos = []
+if 'registry' not in st.session_state:
+    # Photos of the current batch, unassigned set and SKU groups
+    st.session_state.registry = PhotoRegistry()
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 'upload'
 if 'ai_settings' not in st.session_state:
@@ -103,52 +105,38 @@ if 'ai_settings' not in st.session_state:
     }
 if 'selected_photos' not in st.session_state:
     st.session_state.selected_photos = set()
+if 'edit_tracker' not in st.session_state:
+    # Review-table corrections already written to the feedback table
+    st.session_state.edit_tracker = EditTracker()
+if 'batch_owner' not in st.session_state:
+    # Owner token for this tab's AI batches; kept in the URL so a reopened tab finds its batch again
+    if 'session' not in st.query_params:
+        st.query_params['session'] = uuid.uuid4().hex
+    st.session_state.batch_owner = st.query_params['session']
 
 # Create necessary directories and files
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 FEEDBACK_DB = DATA_DIR / "feedback.db"
 CONFIG_FILE = DATA_DIR / "config.json"
+# Background AI workers started for a queued batch, and how often the page polls them
+DEFAULT_WORKER_PROCESSES = 2
+POLL_SECONDS = 2
+@st.cache_resource
+def get_pipeline() -> ListingPipeline:
+    """Ingestion/AI/save pipeline and its caches, shared across reruns and sessions"""
+    pipeline = ListingPipeline(DATA_DIR)
+    pipeline.init_database()
+    return pipeline
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Durable per-SKU AI jobs, processed by ai_worker.py processes"""
+    return JobQueue(get_pipeline().feedback_db)
 
 def init_database():
-    """Initialize SQLite database for feedback"""
-    conn = sqlite3.connect(FEEDBACK_DB)
-    cursor = conn.cursor()
-
-    # Create feedback table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            field_name TEXT,
-            original_value TEXT,
-            corrected_value TEXT,
-            product_type TEXT,
-            context TEXT
-        )
-    """)
-
-    # Create listings table for saving results
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS listings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sku TEXT UNIQUE,
-            title TEXT,
-            description TEXT,
-            price REAL,
-            category TEXT,
-            material TEXT,
-            size TEXT,
-            color TEXT,
-            condition TEXT,
-            brand TEXT,
-            photos TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    """Initialize SQLite database for feedback (once per process, via get_pipeline)"""
+    get_pipeline()
 
 def load_config():
     """Load configuration from file"""
@@ -166,34 +154,16 @@ def save_config(config):
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=2)
 
-def get_image_hash(image_bytes):
-    """Generate hash for image to use as identifier"""
-    return hashlib.md5(image_bytes).hexdigest()[:12]
-
 def process_uploaded_files(uploaded_files):
     """Process uploaded files and store in session state"""
-    photos = []
-    for file in uploaded_files:
-        image_bytes = file.read()
-        image = Image.open(io.BytesIO(image_bytes))
-
-        # Create thumbnail for display
-        thumbnail = image.copy()
-        thumbnail.thumbnail((300, 300))
-        thumb_io = io.BytesIO()
-        thumbnail.save(thumb_io, format='JPEG')
-        thumb_bytes = thumb_io.getvalue()
-
-        photo_data = {
-            'name': file.name,
-            'hash': get_image_hash(image_bytes),
-            'image_bytes': image_bytes,
-            'thumbnail_bytes': thumb_bytes,
-            'assigned': False
-        }
-        photos.append(photo_data)
+    # Decoding and thumbnailing run on a worker pool (see image_pipeline);
+    # bytes go to the photo store and only references come back. Reruns
+    # with the same uploads are served from the photo cache.
+    return get_pipeline().ingest(uploaded_files)
 
-    return photos
+def thumbnail_path(photo: dict) -> str:
+    """Path of a photo's stored thumbnail, for st.image"""
+    return str(get_pipeline().store.path(photo['hash'], THUMBNAIL))
 
 def render_upload_page():
     """Render the photo upload page"""
@@ -209,17 +179,22 @@ def render_upload_page():
 
     if uploaded_files:
         photos = process_uploaded_files(uploaded_files)
-        st.session_state.uploaded_photos = photos
-        st.session_state.unassigned_photos = [p['hash'] for p in photos]
+        registry = st.session_state.registry
+        # Reruns with the same uploads keep any assignments already made
+        if registry.hashes() != [p['hash'] for p in photos]:
+            registry.reset(photos)
 
         st.success(f"✅ Uploaded {len(photos)} photos successfully!")
+        duplicate_count = len(uploaded_files) - len(photos)
+        if duplicate_count:
+            st.info(f"Skipped {duplicate_count} duplicate photo(s)")
 
         # Show preview
         st.subheader("Preview")
         cols = st.columns(6)
         for idx, photo in enumerate(photos[:12]):
             with cols[idx % 6]:
-                st.image(photo['thumbnail_bytes'], caption=photo['name'][:20])
+                st.image(thumbnail_path(photo), caption=photo['name'][:20])
 
         if len(photos) > 12:
             st.info(f"... and {len(photos) - 12} more photos")
@@ -231,15 +206,52 @@ def render_upload_page():
                 st.rerun()
         with col2:
             if st.button("🔄 Clear and Re-upload", use_container_width=True):
-                st.session_state.uploaded_photos = []
-                st.session_state.unassigned_photos = []
+                st.session_state.registry.reset()
                 st.rerun()
 
+def select_photos(photo_hashes):
+    """Replace the current selection, keeping the grid checkboxes in sync (button callback)"""
+    for photo_hash in st.session_state.selected_photos:
+        st.session_state[f"select_{photo_hash}"] = False
+    st.session_state.selected_photos = set(photo_hashes)
+    for photo_hash in st.session_state.selected_photos:
+        st.session_state[f"select_{photo_hash}"] = True
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_group_suggestions(dhashes: tuple) -> List[List[int]]:
+    """suggest_groups once per set of unassigned photos, not on every rerun (e.g. each checkbox click)"""
+    return suggest_groups(list(dhashes))
+
+def render_group_suggestions(unassigned_photos):
+    """Show look-alike photo groups the operator can select in one click"""
+    groups = cached_group_suggestions(tuple(p.get('dhash') for p in unassigned_photos))
+    if not groups:
+        return
+
+    with st.expander(f"💡 Suggested Groups ({len(groups)})", expanded=True):
+        st.caption("Photos that look alike. Select a group, enter its SKU and assign.")
+        for group_idx, members in enumerate(groups[:20]):
+            group_photos = [unassigned_photos[i] for i in members]
+            cols = st.columns([5, 1])
+            with cols[0]:
+                st.image([thumbnail_path(p) for p in group_photos[:6]], width=80)
+            with cols[1]:
+                st.button(
+                    f"Select {len(group_photos)}",
+                    key=f"suggest_{group_idx}",
+                    use_container_width=True,
+                    on_click=select_photos,
+                    args=([p['hash'] for p in group_photos],)
+                )
+        if len(groups) > 20:
+            st.info(f"... and {len(groups) - 20} more groups")
+
 def render_sku_assignment_page():
     """Render the SKU assignment interface"""
     st.title("🏷️ SKU Assignment")
 
-    if not st.session_state.unassigned_photos:
+    registry = st.session_state.registry
+    if not registry.unassigned_count:
         st.success("✅ All photos have been assigned!")
         if st.button("🤖 Process with AI", type="primary"):
             st.session_state.current_page = 'ai_processing'
@@ -247,16 +259,13 @@ def render_sku_assignment_page():
         return
 
     # Stats
-    total_photos = len(st.session_state.uploaded_photos)
-    assigned_photos = total_photos - len(st.session_state.unassigned_photos)
-
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Photos", total_photos)
+        st.metric("Total Photos", len(registry))
     with col2:
-        st.metric("Assigned", assigned_photos)
+        st.metric("Assigned", registry.assigned_count)
     with col3:
-        st.metric("Remaining", len(st.session_state.unassigned_photos))
+        st.metric("Remaining", registry.unassigned_count)
 
     st.markdown("---")
 
@@ -273,8 +282,9 @@ def render_sku_assignment_page():
     st.subheader("Select photos for this product:")
 
     # Get unassigned photos
-    unassigned_photos = [p for p in st.session_state.uploaded_photos
-                        if p['hash'] in st.session_state.unassigned_photos]
+    unassigned_photos = registry.unassigned()
+
+    render_group_suggestions(unassigned_photos)
 
     # Display photos in grid
     cols_per_row = 6
@@ -288,14 +298,13 @@ def render_sku_assignment_page():
                 photo = unassigned_photos[photo_idx]
                 with cols[col_idx]:
                     # Display photo
-                    st.image(photo['thumbnail_bytes'], use_column_width=True)
+                    st.image(thumbnail_path(photo), use_column_width=True)
 
-                    # Checkbox
-                    selected = st.checkbox(
-                        photo['name'][:15] + "...",
-                        key=f"select_{photo['hash']}",
-                        value=photo['hash'] in st.session_state.selected_photos
-                    )
+                    # Checkbox (state lives in session state only, so select_photos can set it)
+                    key = f"select_{photo['hash']}"
+                    if key not in st.session_state:
+                        st.session_state[key] = photo['hash'] in st.session_state.selected_photos
+                    selected = st.checkbox(photo['name'][:15] + "...", key=key)
 
                     if selected:
                         st.session_state.selected_photos.add(photo['hash'])
@@ -304,155 +313,50 @@ def render_sku_assignment_page():
 
     # Process assignment
     if assign_button and sku and st.session_state.selected_photos:
-        # Create photo group
-        st.session_state.photo_groups[sku] = list(st.session_state.selected_photos)
-
-        # Remove from unassigned
-        for photo_hash in st.session_state.selected_photos:
-            st.session_state.unassigned_photos.remove(photo_hash)
+        # Create photo group and remove from unassigned
+        registry.assign(sku, st.session_state.selected_photos)
 
         # Clear selection
         st.session_state.selected_photos.clear()
 
-        st.success(f"✅ Assigned {len(st.session_state.photo_groups[sku])} photos to SKU: {sku}")
+        st.success(f"✅ Assigned {len(registry.groups[sku])} photos to SKU: {sku}")
         st.rerun()
 
     # Quick actions
     st.markdown("---")
     col1, col2, col3 = st.columns(3)
     with col1:
-        if st.button("Select All", use_container_width=True):
-            st.session_state.selected_photos = set(p['hash'] for p in unassigned_photos)
-            st.rerun()
+        # Callbacks run before the rerun, so the grid checkboxes can be updated
+        st.button("Select All", use_container_width=True,
+                  on_click=select_photos, args=([p['hash'] for p in unassigned_photos],))
     with col2:
-        if st.button("Clear Selection", use_container_width=True):
-            st.session_state.selected_photos.clear()
-            st.rerun()
+        st.button("Clear Selection", use_container_width=True,
+                  on_click=select_photos, args=([],))
     with col3:
         selected_count = len(st.session_state.selected_photos)
         st.info(f"Selected: {selected_count} photos")
 
-def get_ai_prompt_with_rules(sku: str, config: dict) -> str:
-    """Generate AI prompt with user-defined rules and feedback"""
-    # Get recent feedback examples
-    conn = sqlite3.connect(FEEDBACK_DB)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT field_name, original_value, corrected_value, product_type
-        FROM feedback
-        ORDER BY timestamp DESC
-        LIMIT 10
-    """)
-    feedback_examples = cursor.fetchall()
-    conn.close()
-
-    # Build feedback section
-    feedback_text = ""
-    if feedback_examples:
-        feedback_text = "\n\nLEARN FROM THESE CORRECTIONS:\n"
-        for field, original, corrected, product_type in feedback_examples:
-            feedback_text += f"- For {product_type}, when {field} was '{original}', user corrected to '{corrected}'\n"
-
-    # Build pricing rules
-    pricing_text = "\n\nPRICING RULES:\n"
-    for rule in config.get('pricing_rules', []):
-        pricing_text += f"- If {rule['condition']}, set price to ${rule['price']}\n"
-
-    prompt = f"""You are an expert eBay listing creator. Analyze these product images and create a professional listing.
-
-SKU: {sku}
-
-TITLE FORMULA: {config.get('title_formula', '[Brand] [Product_Type] Size [Size] [Color] [Condition]')}
-{pricing_text}
-{feedback_text}
-
-Analyze the images and provide the following in JSON format:
-{{
-    "title": "Professional eBay title following the formula",
-    "description": "Detailed product description (3-4 paragraphs)",
-    "category": "Most specific eBay category",
-    "price": 0.00,
-    "brand": "Brand name or 'Unbranded'",
-    "product_type": "Specific product type",
-    "material": "Primary material",
-    "size": "Size or 'N/A'",
-    "color": "Primary color",
-    "condition": "New/Used/Pre-owned",
-    "features": ["feature1", "feature2", "feature3"],
-    "item_specifics": {{"key": "value"}}
-}}
-
-Be specific and accurate. Use the title formula exactly."""
-
-    return prompt
-
-def process_with_ai(sku: str, photo_hashes: List[str], config: dict) -> dict:
-    """Process product group with Gemini AI"""
-    # Get photos
-    photos = [p for p in st.session_state.uploaded_photos if p['hash'] in photo_hashes]
-
-    if not config.get('gemini_api_key'):
-        return {
-            'title': f'Product {sku}',
-            'description': 'AI processing requires Gemini API key. Please configure in AI Settings.',
-            'category': 'General',
-            'price': 0.00,
-            'brand': 'Unknown',
-            'material': 'Unknown',
-            'size': 'N/A',
-            'color': 'Unknown',
-            'condition': 'Used'
-        }
+def start_workers(config: dict):
+    """Make sure background workers are running for queued jobs"""
+    ensure_workers(DATA_DIR, int(config.get('worker_processes', DEFAULT_WORKER_PROCESSES)), get_job_queue())
 
-    try:
-        # Configure Gemini
-        genai.configure(api_key=config['gemini_api_key'])
-        model = genai.GenerativeModel('gemini-1.5-flash')
-
-        # Prepare images
-        image_parts = []
-        for photo in photos[:5]:  # Limit to 5 images
-            image = Image.open(io.BytesIO(photo['image_bytes']))
-            image_parts.append(image)
-
-        # Generate prompt
-        prompt = get_ai_prompt_with_rules(sku, config)
-
-        # Get AI response
-        response = model.generate_content([prompt] + image_parts)
-
-        # Parse JSON response
-        try:
-            result = json.loads(response.text)
-            return result
-        except:
-            # Fallback if JSON parsing fails
-            return {
-                'title': f'Product {sku}',
-                'description': response.text[:500],
-                'category': 'General',
-                'price': 0.00,
-                'brand': 'Unknown',
-                'material': 'Unknown',
-                'size': 'N/A',
-                'color': 'Unknown',
-                'condition': 'Used'
-            }
-
-    except Exception as e:
-        st.error(f"AI Error: {str(e)}")
-        return {
-            'title': f'Product {sku} - Error',
-            'description': f'Error processing with AI: {str(e)}',
-            'category': 'General',
-            'price': 0.00,
-            'brand': 'Unknown',
-            'material': 'Unknown',
-            'size': 'N/A',
-            'color': 'Unknown',
-            'condition': 'Used'
-        }
+@st.fragment(run_every=POLL_SECONDS)
+def render_batch_progress(batch_id: int, config: dict):
+    """Live progress of a queued batch; reloads the page once every job has finished"""
+    progress = get_job_queue().progress(batch_id)
+    finished = progress['done'] + progress['failed']
+    if finished == progress['total']:
+        st.rerun()
+
+    # Workers that died or went idle are replaced on the next poll
+    start_workers(config)
+    st.progress(
+        finished / max(progress['total'], 1),
+        text=f"🔄 Processing with AI... {finished}/{progress['total']} listings "
+             f"({progress['running']} in progress, {progress['failed']} failed)"
+    )
+    st.caption("You can close this tab - processing continues in the background and results are saved as they arrive. "
+               "Reopen this page's address to pick the results back up.")
 
 def render_ai_processing_page():
     """Process all SKU groups with AI and show editable results"""
@@ -460,18 +364,31 @@ def render_ai_processing_page():
 
     config = load_config()
 
-    if 'ai_results' not in st.session_state:
-        # Process all groups
-        with st.spinner("🔄 Processing with AI..."):
-            results = {}
-            progress_bar = st.progress(0)
+    queue = get_job_queue()
+    if 'ai_batch_id' not in st.session_state:
+        if st.session_state.registry.groups:
+            # Queue one job per SKU group; workers process them outside this script run
+            st.session_state.ai_batch_id = queue.submit(st.session_state.registry.groups, config,
+                                                        st.session_state.batch_owner)
+            st.session_state.edit_tracker.reset()
+            start_workers(config)
+        else:
+            # e.g. after the browser tab was closed: pick this tab's last batch back up from the database
+            st.session_state.ai_batch_id = queue.latest_batch(st.session_state.batch_owner)
+    batch_id = st.session_state.ai_batch_id
+    if batch_id is None:
+        del st.session_state.ai_batch_id
+        st.info("No AI batch yet - upload photos and assign SKUs first.")
+        return
 
-            total_groups = len(st.session_state.photo_groups)
-            for idx, (sku, photo_hashes) in enumerate(st.session_state.photo_groups.items()):
-                results[sku] = process_with_ai(sku, photo_hashes, config)
-                progress_bar.progress((idx + 1) / total_groups)
+    progress = queue.progress(batch_id)
+    if progress['done'] + progress['failed'] < progress['total']:
+        render_batch_progress(batch_id, config)
+        return
 
-            st.session_state.ai_results = results
+    results, errors = queue.results(batch_id)
+    for sku, error in errors.items():
+        st.error(f"AI Error ({sku}): {error}")
 
     # Display editable results
     st.subheader("📝 Review and Edit Results")
@@ -479,7 +396,7 @@ def render_ai_processing_page():
 
     # Convert results to DataFrame for editing
     df_data = []
-    for sku, data in st.session_state.ai_results.items():
+    for sku, data in results.items():
         row = {
             'SKU': sku,
             'Title': data.get('title', ''),
@@ -516,26 +433,15 @@ def render_ai_processing_page():
         }
     )
 
-    # Save feedback for changes
-    if not df.equals(edited_df):
-        conn = sqlite3.connect(FEEDBACK_DB)
-        cursor = conn.cursor()
-
-        for idx, row in edited_df.iterrows():
-            original_row = df.iloc[idx]
-            sku = row['SKU']
-
-            # Check each field for changes
-            for field in ['Title', 'Price', 'Category', 'Brand', 'Material', 'Size', 'Color', 'Condition']:
-                if row[field] != original_row[field]:
-                    cursor.execute("""
-                        INSERT INTO feedback (field_name, original_value, corrected_value, product_type)
-                        VALUES (?, ?, ?, ?)
-                    """, (field, str(original_row[field]), str(row[field]), row.get('Category', 'Unknown')))
-
-        conn.commit()
-        conn.close()
-        st.success("✅ Feedback saved for AI learning!")
+    # Save feedback for changes (each correction once; reruns re-showing it write nothing)
+    tracker = st.session_state.edit_tracker
+    corrections, reverted = tracker.pending(
+        df, edited_df, {sku: data.get('product_type') or '' for sku, data in results.items()})
+    if corrections or reverted:
+        get_pipeline().record_feedback(corrections, reverted)
+        tracker.mark_recorded(corrections, reverted)
+        if corrections:
+            st.success("✅ Feedback saved for AI learning!")
 
     # Action buttons
     st.markdown("---")
@@ -543,36 +449,31 @@ def render_ai_processing_page():
 
     with col1:
         if st.button("💾 Save to Database", type="primary", use_container_width=True):
-            # Save to database
-            conn = sqlite3.connect(FEEDBACK_DB)
-            cursor = conn.cursor()
-
-            for idx, row in edited_df.iterrows():
-                sku = row['SKU']
-                photo_hashes = st.session_state.photo_groups[sku]
-
-                cursor.execute("""
-                    INSERT OR REPLACE INTO listings
-                    (sku, title, description, price, category, material, size, color, condition, brand, photos)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    sku, row['Title'], row['Description'], row['Price'],
-                    row['Category'], row['Material'], row['Size'],
-                    row['Color'], row['Condition'], row['Brand'],
-                    json.dumps(photo_hashes)
-                ))
-
-            conn.commit()
-            conn.close()
-            st.success("✅ Saved to database!")
+            # Save rows changed since the last save (review columns map onto listing fields by name)
+            changed = tracker.unsaved(edited_df)
+            get_pipeline().save_listings(
+                changed.rename(columns=str.lower).to_dict('records'),
+                queue.photo_groups(batch_id)
+            )
+            tracker.mark_saved(edited_df)
+            st.success(f"✅ Saved to database! ({len(changed)} changed)")
 
     with col2:
-        # Export to CSV
-        csv = edited_df.to_csv(index=False)
+        # Export to CSV (written only when the button is clicked)
+        layout = st.selectbox(
+            "Export format",
+            list(EXPORT_LAYOUTS),
+            format_func=lambda key: EXPORT_LAYOUTS[key][0],
+            label_visibility="collapsed"
+        )
+
+        def export_review_table() -> TextIO:
+            return csv_file(frame_listings(edited_df), layout)
+
         st.download_button(
             label="📥 Download CSV",
-            data=csv,
-            file_name=f"ebay_listings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            data=export_review_table,
+            file_name=f"ebay_listings_{layout}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             mime="text/csv",
             use_container_width=True
         )
@@ -580,13 +481,13 @@ def render_ai_processing_page():
     with col3:
         if st.button("🔄 Start New Batch", use_container_width=True):
             # Clear session state
-            st.session_state.uploaded_photos = []
-            st.session_state.photo_groups = {}
-            st.session_state.unassigned_photos = []
+            st.session_state.registry.reset()
             st.session_state.current_page = 'upload'
             st.session_state.selected_photos = set()
-            if 'ai_results' in st.session_state:
-                del st.session_state.ai_results
+            st.session_state.edit_tracker.reset()
+            # Closed, so an empty AI Processing page doesn't bring the old listings back
+            queue.close(batch_id)
+            del st.session_state.ai_batch_id
             st.rerun()
 
 def render_ai_settings_page():
@@ -604,6 +505,63 @@ def render_ai_settings_page():
         help="Get your free API key at https://makersuite.google.com/app/apikey"
     )
 
+    # Image size sent to the model
+    preset_names = list(MODEL_INPUT_PRESETS)
+    current_preset = config.get('model_image_preset', DEFAULT_MODEL_PRESET)
+    image_preset = st.selectbox(
+        "Image Quality Sent to AI",
+        preset_names,
+        index=preset_names.index(current_preset) if current_preset in preset_names else 0,
+        format_func=lambda name: (
+            f"{name.title()} (max {MODEL_INPUT_PRESETS[name]['max_edge']}px, "
+            f"{MODEL_INPUT_PRESETS[name]['max_megapixels']}MP)"
+        ),
+        help="Photos are downscaled before upload - smaller is faster and cheaper"
+    )
+
+    # Concurrency
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        max_concurrent = st.number_input(
+            "Parallel AI Requests",
+            min_value=1, max_value=32,
+            value=int(config.get('max_concurrent_requests', DEFAULT_MAX_IN_FLIGHT)),
+            help="How many SKUs are sent to Gemini at once"
+        )
+    with col2:
+        request_timeout = st.number_input(
+            "Request Timeout (s)",
+            min_value=10, max_value=600,
+            value=int(config.get('request_timeout', DEFAULT_TIMEOUT))
+        )
+    with col3:
+        request_retries = st.number_input(
+            "Retries",
+            min_value=0, max_value=10,
+            value=int(config.get('request_retries', DEFAULT_RETRIES)),
+            help="Failed or timed-out requests are retried with backoff"
+        )
+    with col4:
+        worker_processes = st.number_input(
+            "Worker Processes",
+            min_value=1, max_value=8,
+            value=int(config.get('worker_processes', DEFAULT_WORKER_PROCESSES)),
+            help="Background processes working through queued SKUs, each with its own parallel requests"
+        )
+
+    # Response cache
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        ai_cache_bypass = st.toggle(
+            "Bypass AI response cache",
+            value=config.get('ai_cache_bypass', False),
+            help="Always call Gemini, even for photo groups it has already answered (fresh answers still refresh the cache)"
+        )
+    with col2:
+        if st.button("🗑️ Clear Cache", use_container_width=True):
+            get_pipeline().response_cache.clear()
+            st.success("✅ AI cache cleared")
+
     st.markdown("---")
 
     # Title Formula
@@ -616,6 +574,14 @@ def render_ai_settings_page():
         help="AI will follow this formula when generating titles"
     )
 
+    product_type = st.text_input(
+        "Typical Product Type, as the AI names it (optional)",
+        value=config.get('product_type', ''),
+        placeholder="e.g. Sweater",
+        help="Corrections you made to listings the AI gave this product type are shown to the AI first. "
+             "Use the AI's product type (e.g. Sweater), not the eBay category path."
+    )
+
     st.markdown("---")
 
     # Pricing Rules
@@ -674,26 +640,23 @@ def render_ai_settings_page():
     # Feedback History
     st.subheader("📊 Learning History")
 
-    conn = sqlite3.connect(FEEDBACK_DB)
-
     # Get feedback stats
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM feedback")
-    feedback_count = cursor.fetchone()[0]
+    feedback_count = get_pipeline().counts()['feedback']
 
     if feedback_count > 0:
         st.metric("Total Corrections Learned", feedback_count)
 
         # Show recent feedback
-        df_feedback = pd.read_sql_query(
-            """
-            SELECT timestamp, field_name, original_value, corrected_value, product_type
-            FROM feedback
-            ORDER BY timestamp DESC
-            LIMIT 20
-            """,
-            conn
-        )
+        with db.connect(FEEDBACK_DB) as conn:
+            df_feedback = pd.read_sql_query(
+                """
+                SELECT timestamp, field_name, original_value, corrected_value, product_type
+                FROM feedback
+                ORDER BY timestamp DESC
+                LIMIT 20
+                """,
+                conn
+            )
 
         if not df_feedback.empty:
             st.write("**Recent Corrections:**")
@@ -701,13 +664,18 @@ def render_ai_settings_page():
     else:
         st.info("No corrections yet. The AI will learn from your edits in the review stage.")
 
-    conn.close()
-
     # Save button
     st.markdown("---")
     if st.button("💾 Save Settings", type="primary", use_container_width=True):
         config['gemini_api_key'] = api_key
         config['title_formula'] = title_formula
+        config['product_type'] = product_type.strip()
+        config['model_image_preset'] = image_preset
+        config['max_concurrent_requests'] = int(max_concurrent)
+        config['request_timeout'] = int(request_timeout)
+        config['request_retries'] = int(request_retries)
+        config['worker_processes'] = int(worker_processes)
+        config['ai_cache_bypass'] = ai_cache_bypass
         save_config(config)
         st.success("✅ Settings saved successfully!")
 
@@ -736,14 +704,15 @@ def render_sidebar():
         st.markdown("---")
         st.subheader("📊 Current Session")
 
-        if st.session_state.uploaded_photos:
-            st.metric("Total Photos", len(st.session_state.uploaded_photos))
-            st.metric("SKU Groups", len(st.session_state.photo_groups))
+        registry = st.session_state.registry
+        if len(registry):
+            st.metric("Total Photos", len(registry))
+            st.metric("SKU Groups", len(registry.groups))
 
             # Show groups
-            if st.session_state.photo_groups:
+            if registry.groups:
                 st.write("**Groups:**")
-                for sku, photos in st.session_state.photo_groups.items():
+                for sku, photos in registry.groups.items():
                     st.text(f"• {sku}: {len(photos)} photos")
         else:
             st.info("No photos uploaded yet")
@@ -752,20 +721,33 @@ def render_sidebar():
         st.markdown("---")
         st.subheader("📈 Database Stats")
 
-        conn = sqlite3.connect(FEEDBACK_DB)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM listings")
-        listing_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM feedback")
-        feedback_count = cursor.fetchone()[0]
-
-        conn.close()
+        counts = get_pipeline().counts()
+        listing_count = counts['listings']
+        feedback_count = counts['feedback']
 
         st.metric("Total Listings", listing_count)
         st.metric("AI Corrections", feedback_count)
 
+        # AI response cache stats
+        ai_cache_stats = get_pipeline().response_cache.stats()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("AI Cache Hits", ai_cache_stats['hits'])
+        with col2:
+            st.metric("AI Cache Misses", ai_cache_stats['misses'])
+
+        # Photo cache stats
+        cache_stats = get_pipeline().photo_cache.stats()
+        if cache_stats['hits'] or cache_stats['misses']:
+            st.markdown("---")
+            st.subheader("⚡ Photo Cache")
+            st.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+            st.caption(
+                f"{cache_stats['entries']}/{cache_stats['max_entries']} cached • "
+                f"{cache_stats['evictions']} evicted • {cache_stats['spill_hits']} from disk • "
+                f"{cache_stats['spill_bytes'] / 2**20:.0f} MB spilled"
+            )
+
 def main():
     """Main application entry point"""
     # Initialize database
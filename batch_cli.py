@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Headless batch run of the app.py listing pipeline - photos in, CSV out
+Ingests a photo directory, groups photos by a photo -> SKU mapping file,
+runs every group through Gemini, saves to the listings table and exports
+
+Mapping file: CSV rows of `photo,sku` (an optional header row is skipped),
+or JSON as {"SKU1": ["a.jpg", "b.jpg"]} or {"a.jpg": "SKU1"}. Photo paths
+are relative to the photo directory.
+
+Usage: python batch_cli.py PHOTO_DIR MAPPING [--data-dir data] [--layout ebay] [--api-key KEY]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from listing_export import LAYOUTS as EXPORT_LAYOUTS, export_path, write_csv
+from listing_pipeline import ListingPipeline, load_config
+from photo_store import content_hash
+
+# Files held open at once while ingesting; each chunk is ingested in parallel
+INGEST_CHUNK_FILES = 256
+PROGRESS_EVERY = 25
+
+
+def read_mapping(path: Path) -> List[Tuple[str, str]]:
+    """(photo, sku) pairs in file order"""
+    if path.suffix.lower() == '.json':
+        data = json.loads(path.read_text(encoding='utf-8'))
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: expected a JSON object")
+        if all(isinstance(value, list) for value in data.values()):
+            return [(str(photo), str(sku)) for sku, photos in data.items() for photo in photos]
+        return [(str(photo), str(sku)) for photo, sku in data.items()]
+
+    pairs = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or not row[0].strip():
+                continue
+            if not pairs and row[1].strip().lower() == 'sku':
+                continue  # header
+            pairs.append((row[0].strip(), row[1].strip()))
+    return pairs
+
+
+def ingest_directory(pipeline: ListingPipeline, photo_dir: Path, names: List[str]) -> Dict[str, str]:
+    """Store every named photo; returns name -> content hash"""
+    hashes: Dict[str, str] = {}
+    for start in range(0, len(names), INGEST_CHUNK_FILES):
+        chunk = names[start:start + INGEST_CHUNK_FILES]
+        with ExitStack() as stack:
+            uploads = [stack.enter_context(open(photo_dir / name, 'rb')) for name in chunk]
+            by_path = {photo['name']: photo['hash'] for photo in pipeline.ingest(uploads)}
+        for name in chunk:
+            digest = by_path.get(str(photo_dir / name))
+            # Exact duplicates of an earlier file are dropped by ingest; they share its hash
+            hashes[name] = digest or content_hash((photo_dir / name).read_bytes())
+    return hashes
+
+
+def run_batch(pipeline: ListingPipeline, photo_dir: Path, mapping: List[Tuple[str, str]], config: dict,
+              export_dir: Path, layout: str = 'csv', name: str = 'batch_listings',
+              log=print) -> Tuple[Dict[str, dict], Dict[str, str], Path]:
+    """Ingest, process, save and export one batch; returns (listings, errors, export path)"""
+    pipeline.init_database()
+    names = list(dict.fromkeys(photo for photo, _ in mapping))
+    missing = [photo for photo in names if not (photo_dir / photo).is_file()]
+    if missing:
+        raise FileNotFoundError(f"{len(missing)} mapped photo(s) not found, e.g. {photo_dir / missing[0]}")
+
+    start = time.perf_counter()
+    hashes = ingest_directory(pipeline, photo_dir, names)
+    ingest_s = time.perf_counter() - start
+    log(f"ingest: {len(names)} photos ({len(set(hashes.values()))} unique) in {ingest_s:.1f}s "
+        f"({len(names) / max(ingest_s, 1e-9):.1f} photos/s)")
+
+    groups: Dict[str, List[str]] = {}
+    for photo, sku in mapping:
+        group = groups.setdefault(sku, [])
+        if hashes[photo] not in group:
+            group.append(hashes[photo])
+    tasks = [(sku, [{'hash': digest} for digest in group]) for sku, group in groups.items()]
+
+    def on_result(index, result, done):
+        if done % PROGRESS_EVERY == 0 or done == len(tasks):
+            elapsed = time.perf_counter() - start
+            log(f"  {done}/{len(tasks)} listings ({done / max(elapsed, 1e-9):.1f}/s)")
+
+    start = time.perf_counter()
+    results, errors = pipeline.process_groups(tasks, config, on_result=on_result)
+    ai_s = time.perf_counter() - start
+    log(f"ai: {len(tasks)} listings in {ai_s:.1f}s ({len(tasks) / max(ai_s, 1e-9):.2f} listings/s), "
+        f"{len(errors)} failed")
+
+    # Same writer as the review page's Save button
+    listings = [dict(listing, sku=sku) for sku, listing in results.items()]
+    start = time.perf_counter()
+    pipeline.save_listings(listings, groups)
+    path = export_path(export_dir, name, layout)
+    rows = write_csv(listings, path, layout)
+    log(f"save + export: {rows} rows in {time.perf_counter() - start:.2f}s -> {path}")
+    return results, errors, path
+
+
+def main(argv: Optional[List[str]] = None, genai_module=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('photo_dir', type=Path)
+    parser.add_argument('mapping', type=Path, help="photo -> SKU mapping (.csv or .json)")
+    parser.add_argument('--data-dir', type=Path, default=Path("data"))
+    parser.add_argument('--export-dir', type=Path, help="defaults to DATA_DIR/exports")
+    parser.add_argument('--layout', choices=list(EXPORT_LAYOUTS), default='csv')
+    parser.add_argument('--name', default='batch_listings', help="export file name prefix")
+    parser.add_argument('--api-key', help="defaults to $GEMINI_API_KEY, then the app's saved key")
+    parser.add_argument('--max-in-flight', type=int, help="concurrent Gemini requests")
+    parser.add_argument('--no-cache', action='store_true', help="ignore cached AI responses")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.data_dir)
+    api_key = args.api_key or os.environ.get('GEMINI_API_KEY')
+    if api_key:
+        config['gemini_api_key'] = api_key
+    if not config.get('gemini_api_key'):
+        parser.error("no Gemini API key (use --api-key, $GEMINI_API_KEY or the app's AI Settings)")
+    if args.max_in_flight:
+        config['max_concurrent_requests'] = args.max_in_flight
+    if args.no_cache:
+        config['ai_cache_bypass'] = True
+
+    mapping = read_mapping(args.mapping)
+    if not mapping:
+        parser.error(f"{args.mapping}: no photo -> SKU rows")
+
+    pipeline = ListingPipeline(args.data_dir, genai_module)
+    try:
+        _, errors, _ = run_batch(pipeline, args.photo_dir, mapping, config,
+                                 args.export_dir or args.data_dir / "exports", args.layout, args.name)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    for sku, error in errors.items():
+        print(f"AI Error ({sku}): {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Chat context benchmark - conversation text sent with the listing request
+as sessions grow, the full transcript versus compact_conversation
+
+Sessions repeat a realistic product loop: help text, photo upload, AI
+questions, seller answers, draft listing, a change request, save.
+
+Usage: python benchmarks/bench_chat_context.py [--products 1 5 20 50] [--budget 1500]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chat_context import compact_conversation, estimate_tokens, render_transcript  # noqa: E402
+
+WELCOME = ("👋 Hey! I'm your eBay listing assistant. Send me photos of your item and I'll help create a "
+           "professional listing!\n\nJust upload photos and I'll ask you some questions to get all the details right.")
+HELP = """I'm here to help create eBay listings! Here's what you can do:
+
+📸 **Upload photos** - I'll analyze them and ask clarifying questions
+🔑 **Set API key** - Paste your Gemini API key to get started
+📋 **View my listings** - See all saved listings
+💾 **Export CSV** - Download your listings
+
+What would you like to do?"""
+
+
+def product_loop(i):
+    description = ("Classic wool crewneck in navy with ribbed cuffs and hem. Light pilling under the arms, "
+                   "no holes or stains. Measurements: 22in pit to pit, 27in length. ") * 4
+    return [
+        {'role': 'user', 'content': "hi"},
+        {'role': 'assistant', 'content': HELP},
+        {'role': 'user', 'content': "*Uploaded 4 photo(s)*"},
+        {'role': 'assistant', 'content': f"📸 Got 4 photo(s)!\n\nI can see this is a **Sweater #{i}**.\n\n"
+                                         "Let me ask you a few questions:\n\n• What's the brand?\n• What size?\n"
+                                         "• Any defects?"},
+        {'role': 'user', 'content': f"It's a J.Crew size M, bought 2019, small pull on the left sleeve #{i}"},
+        {'role': 'assistant', 'content': f"Perfect! Here's your eBay listing:\n\n📝 **Title:**\nJ.Crew Wool Sweater M "
+                                         f"Navy #{i}\n\n📋 **Description:**\n{description}\n\n---\n\nWhat would you "
+                                         "like to do?\n• Type \"looks good\" to save this listing"},
+        {'role': 'user', 'content': "change price to $34"},
+        {'role': 'assistant', 'content': "Sure! What would you like to change? Just tell me:\n• 'Change title to: "
+                                         "[new title]'\n• 'Set price to: $29.99'"},
+        {'role': 'user', 'content': "looks good"},
+        {'role': 'assistant', 'content': f"✅ Awesome! Listing saved with SKU: SKU{i}\n\nReady for another product?"},
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, nargs='+', default=[1, 5, 20, 50])
+    parser.add_argument('--budget', type=int, default=1500)
+    args = parser.parse_args()
+
+    understanding = {'product_type': 'Wool sweater', 'visible_details': ['navy', 'ribbed cuffs', 'crew neck'],
+                     'condition_notes': ['light pilling'], 'photos': ['a', 'b', 'c', 'd']}
+    listing = {'title': 'J.Crew Wool Sweater M Navy', 'price': 34.0, 'size': 'M', 'brand': 'J.Crew'}
+
+    # Pasted keys are dropped; answers that merely contain "sk-" reach the model
+    text, _ = compact_conversation([{'role': 'user', 'content': "desk-lamp, size XL"},
+                                    {'role': 'user', 'content': "Brand is Husk-Tech, risk-free returns"},
+                                    {'role': 'user', 'content': "AIza" + "x" * 35}])
+    assert "desk-lamp, size XL" in text and "Husk-Tech" in text and "AIza" not in text
+
+    print(f"{'products':>9} {'messages':>9} {'full (tokens)':>14} {'compacted':>10} {'kept':>5} {'time (ms)':>10}")
+    for products in args.products:
+        messages = [{'role': 'assistant', 'content': WELCOME}]
+        for i in range(products):
+            messages += product_loop(i)
+        messages.append({'role': 'user', 'content': "It's a Patagonia fleece, size L, no flaws"})
+
+        start = time.perf_counter()
+        text, stats = compact_conversation(messages, understanding, listing, args.budget)
+        elapsed = (time.perf_counter() - start) * 1000
+        assert stats['tokens_before'] == estimate_tokens(render_transcript(messages))
+        assert "Patagonia" in text
+        print(f"{products:>9} {len(messages):>9} {stats['tokens_before']:>14} {stats['tokens_after']:>10} "
+              f"{stats['messages_after']:>5} {elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
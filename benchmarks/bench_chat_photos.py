@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Chat photo analysis benchmark - images sent to the model over a chat where
+photos arrive a few at a time, re-analyzing the accumulated list (first
+five) versus incremental per-photo observations
+
+Reports images uploaded, model calls, and photos the model never saw.
+
+Usage: python benchmarks/bench_chat_photos.py [--rounds 4] [--per-round 3] [--resend 1]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from chat_analysis import ObservationStore, analyze_new_photos, empty_understanding  # noqa: E402
+
+MODEL = 'gemini-1.5-flash'
+IMAGE_BYTES = 150_000  # a "balanced" preset JPEG
+
+
+class CountingModel:
+    """Answers observation prompts; records which photos it was shown"""
+
+    def __init__(self):
+        self.calls = 0
+        self.images = 0
+        self.seen = set()
+
+    def generate_content(self, contents):
+        self.calls += 1
+        parts = [part for part in contents if isinstance(part, dict)]
+        self.images += len(parts)
+        self.seen.update(part['hash'] for part in parts)
+        return type('Response', (), {'text': json.dumps({
+            'photos': [{'product_type': 'Sweater', 'visible_details': [f"detail of {part['hash']}"],
+                        'condition_notes': 'good'} for part in parts],
+            'questions': ["What size is it?"],
+            'confidence': 'high',
+        })})()
+
+
+def load_images(photo_hashes):
+    return [{'mime_type': 'image/jpeg', 'hash': h, 'data': b''} for h in photo_hashes]
+
+
+def uploads(rounds, per_round, resend):
+    sent = []
+    for r in range(rounds):
+        batch = [f"photo{r}_{i}" for i in range(per_round)]
+        # Users often re-send a shot from the previous round
+        batch += sent[-resend:] if sent and resend else []
+        sent += batch[:per_round]
+        yield batch
+
+
+def legacy(rounds, per_round, resend):
+    model = CountingModel()
+    photos = []
+    for batch in uploads(rounds, per_round, resend):
+        for h in batch:
+            if h not in photos:
+                photos.append(h)
+        model.generate_content(["prompt"] + load_images(photos[:5]))
+    return model, photos
+
+
+def incremental(rounds, per_round, resend, store):
+    model = CountingModel()
+    photos = []
+    understanding = empty_understanding()
+    for batch in uploads(rounds, per_round, resend):
+        for h in batch:
+            if h not in photos:
+                photos.append(h)
+        understanding, _, _, _ = analyze_new_photos(model, photos, understanding, store, load_images, MODEL)
+    return model, photos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=4)
+    parser.add_argument('--per-round', type=int, default=3)
+    parser.add_argument('--resend', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ObservationStore(Path(tmp) / "chat.db")
+        print(f"{args.rounds} uploads of {args.per_round} photos (+{args.resend} re-sent)")
+        print(f"{'mode':>12} {'calls':>6} {'images':>7} {'MB sent':>8} {'never seen':>11}")
+        for name, run in (('legacy', lambda: legacy(args.rounds, args.per_round, args.resend)),
+                          ('incremental', lambda: incremental(args.rounds, args.per_round, args.resend, store))):
+            model, photos = run()
+            unseen = len(set(photos) - model.seen)
+            print(f"{name:>12} {model.calls:>6} {model.images:>7} {model.images * IMAGE_BYTES / 2**20:>8.1f} {unseen:>11}")
+
+        # A second product reusing the same photos is answered from the cache
+        model, _ = incremental(args.rounds, args.per_round, args.resend, store)
+        print(f"same photos again: {model.calls} calls, {model.images} images (observation cache)")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Chat streaming benchmark - when the seller first sees the listing title and
+price, waiting for the whole reply versus streaming it through JSONFieldStream
+
+The fake model emits the listing JSON a few characters at a time with a
+fixed per-chunk delay, roughly matching Gemini's streamed output rate.
+
+Usage: python benchmarks/bench_chat_streaming.py [--chunk-chars 24] [--chunk-ms 20] [--description-words 180]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from json_stream import JSONFieldStream, stream_text  # noqa: E402
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+def listing_reply(description_words):
+    listing = {
+        'title': "J.Crew Men's Wool Crewneck Sweater Size M Navy Ribbed",
+        'price': 34.0,
+        'category': "Clothing, Shoes & Accessories > Men > Men's Clothing > Sweaters",
+        'brand': 'J.Crew',
+        'size': 'M',
+        'color': 'Navy',
+        'condition': 'Pre-owned',
+        'description': " ".join(["Soft wool knit with ribbed cuffs and hem, light pilling only."] * (description_words // 10)),
+        'item_specifics': {'Material': 'Wool', 'Neckline': 'Crew Neck', 'Sleeve Length': 'Long Sleeve'},
+    }
+    return "```json\n" + json.dumps(listing, indent=4) + "\n```"
+
+
+def streamed(text, chunk_chars, delay):
+    for start in range(0, len(text), chunk_chars):
+        time.sleep(delay)
+        yield Chunk(text[start:start + chunk_chars])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--chunk-chars', type=int, default=24)
+    parser.add_argument('--chunk-ms', type=float, default=20)
+    parser.add_argument('--description-words', type=int, default=180)
+    args = parser.parse_args()
+
+    reply = listing_reply(args.description_words)
+    delay = args.chunk_ms / 1000
+    expected = json.loads(reply.strip().strip('`').removeprefix('json'))
+
+    # Blocking call: nothing is shown until the last chunk arrives
+    start = time.perf_counter()
+    text = "".join(chunk.text for chunk in streamed(reply, args.chunk_chars, delay))
+    blocking = time.perf_counter() - start
+    assert text == reply
+
+    first_seen = {}
+
+    def on_progress(_text, fields):
+        for key in fields:
+            first_seen.setdefault(key, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    text = stream_text(streamed(reply, args.chunk_chars, delay), on_progress)
+    total = time.perf_counter() - start
+    assert text == reply
+
+    parser_state = JSONFieldStream()
+    for start_index in range(0, len(reply), args.chunk_chars):
+        parser_state.feed(reply[start_index:start_index + args.chunk_chars])
+    assert parser_state.fields == expected, "streamed fields differ from the final reply"
+
+    # Parser cost alone, without the simulated network delay
+    chunks = [reply[i:i + args.chunk_chars] for i in range(0, len(reply), args.chunk_chars)]
+    rounds = 200
+    parse_start = time.perf_counter()
+    for _ in range(rounds):
+        parser_state = JSONFieldStream()
+        for chunk in chunks:
+            parser_state.feed(chunk)
+    per_chunk = (time.perf_counter() - parse_start) / (rounds * len(chunks)) * 1e6
+
+    print(f"reply: {len(reply)} chars in {len(chunks)} chunks of {args.chunk_chars} every {args.chunk_ms:g}ms")
+    print(f"{'':>24} {'time (ms)':>10}")
+    print(f"{'blocking: full reply':>24} {blocking * 1000:>10.0f}")
+    for key in ('title', 'price', 'description', 'item_specifics'):
+        print(f"{'streamed: ' + key:>24} {first_seen[key] * 1000:>10.0f}")
+    print(f"{'streamed: full reply':>24} {total * 1000:>10.0f}")
+    print(f"parser overhead: {per_chunk:.1f}µs per chunk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Conversation storage benchmark - chat_listings.db size and listing scan time
+with inline JSON transcripts versus the compressed conversation store
+
+Each simulated chat session lists several products; every save used to
+copy the whole session transcript (welcome text and help replies included)
+into its listings row. The legacy database is migrated in place by
+conversation_store.init_store, exactly as chat_app does on startup.
+
+Usage: python benchmarks/bench_conversation_store.py [--sessions 200] [--products 5]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from bench_chat_context import WELCOME, product_loop  # noqa: E402
+from conversation_store import init_store, load_conversation  # noqa: E402
+
+
+def build_legacy(path, sessions, products):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE listings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, sku TEXT UNIQUE, title TEXT, description TEXT,
+            price REAL, category TEXT, brand TEXT, size TEXT, color TEXT, condition TEXT,
+            material TEXT, photos TEXT, conversation_history TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    rows = []
+    for s in range(sessions):
+        messages = [{'role': 'assistant', 'content': WELCOME, 'timestamp': '2025-01-01T10:00:00'}]
+        for p in range(products):
+            i = s * products + p
+            messages += [dict(msg, timestamp=f"2025-01-01T10:{p:02d}:{n:02d}")
+                         for n, msg in enumerate(product_loop(i))]
+            rows.append((f"SKU{i}", f"J.Crew Wool Sweater M Navy #{i}", "Classic wool crewneck. " * 20, 34.0,
+                         "Sweaters", "J.Crew", "M", "Navy", "Pre-owned", "Wool", json.dumps(messages)))
+    conn.executemany("""
+        INSERT INTO listings (sku, title, description, price, category, brand, size, color, condition,
+                              material, conversation_history)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def size_mb(path):
+    return sum(os.path.getsize(p) for p in (path, Path(f"{path}-wal")) if os.path.exists(p)) / 2**20
+
+
+def scan_ms(path):
+    """SELECT * over the listings table, as an ad-hoc query or old export would"""
+    start = time.perf_counter()
+    rows = db.read(path, "SELECT * FROM listings")
+    return (time.perf_counter() - start) * 1000, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--products', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "chat_listings.db"
+        listings = build_legacy(path, args.sessions, args.products)
+        before = size_mb(path)
+        scan_before, _ = scan_ms(path)
+
+        start = time.perf_counter()
+        migrated = init_store(path)
+        migrate_s = time.perf_counter() - start
+        db.execute_script(path, "PRAGMA wal_checkpoint(TRUNCATE);")
+        after = size_mb(path)
+        scan_after, _ = scan_ms(path)
+
+        segments, messages = db.read_one(path, "SELECT COUNT(*), SUM(message_count) FROM conversations")
+        conversation_id = db.read_one(path, "SELECT conversation_id FROM listings ORDER BY id DESC LIMIT 1")[0]
+        start = time.perf_counter()
+        history = load_conversation(path, conversation_id)
+        load_ms = (time.perf_counter() - start) * 1000
+        # Migrated verbatim: the last listing's history is its whole session, welcome message included
+        assert migrated == listings and history[0]['content'] == WELCOME
+        assert len(history) == 1 + args.products * len(product_loop(0))
+
+        print(f"{listings} listings from {args.sessions} sessions; migrated {migrated} in {migrate_s:.1f}s "
+              f"into {segments} stored segments")
+        print(f"{'':>8} {'db size (MB)':>13} {'SELECT * (ms)':>14}")
+        print(f"{'inline':>8} {before:>13.2f} {scan_before:>14.1f}")
+        print(f"{'store':>8} {after:>13.2f} {scan_after:>14.1f}")
+        print(f"opening one listing's history: {len(history)} messages in {load_ms:.2f}ms")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Sidebar counter benchmark - cost of the dashboard counts per rerun as the
+listings and feedback tables grow, COUNT(*) versus the trigger-maintained
+row_counts table
+
+Also checks the maintained counts against COUNT(*) after inserts, REPLACEs
+and deletes.
+
+Usage: python benchmarks/bench_counters.py [--sizes 1000 10000 100000 300000]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from listing_pipeline import ListingPipeline  # noqa: E402
+
+RERUNS = 200
+DESCRIPTION = "Vintage wool sweater in good condition. " * 20
+
+
+def grow(pipeline, start, stop):
+    db.write_many(pipeline.feedback_db, """
+        INSERT INTO listings (sku, title, description, price, photos) VALUES (?, ?, ?, ?, ?)
+    """, ((f"SKU{i:07d}", f"Listing {i}", DESCRIPTION, 19.99, json.dumps([])) for i in range(start, stop)))
+    db.write_many(pipeline.feedback_db, """
+        INSERT INTO feedback (field_name, original_value, corrected_value, product_type) VALUES (?, ?, ?, ?)
+    """, (('title', f"Listing {i}", f"Better listing {i}", 'Sweater') for i in range(start, stop)))
+
+
+def per_rerun_us(fn):
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        fn()
+    return (time.perf_counter() - start) / RERUNS * 1e6
+
+
+def count_star(pipeline):
+    db.read_one(pipeline.feedback_db, "SELECT COUNT(*) FROM listings")
+    db.read_one(pipeline.feedback_db, "SELECT COUNT(*) FROM feedback")
+
+
+def check(pipeline):
+    counts = pipeline.counts()
+    for table in ('listings', 'feedback'):
+        actual = db.read_one(pipeline.feedback_db, f"SELECT COUNT(*) FROM {table}")[0]
+        assert counts[table] == actual, (table, counts[table], actual)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 300000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = ListingPipeline(tmp)
+        pipeline.init_database()
+
+        print(f"{'rows':>8} {'COUNT(*) (us/rerun)':>20} {'row_counts (us/rerun)':>22}")
+        rows = 0
+        for n in sorted(args.sizes):
+            grow(pipeline, rows, n)
+            rows = n
+            legacy = per_rerun_us(lambda: count_star(pipeline))
+            maintained = per_rerun_us(pipeline.counts)
+            print(f"{n:>8} {legacy:>20.1f} {maintained:>22.1f}")
+
+        # Saving the same SKUs again replaces rows; deletes must be counted too
+        pipeline.save_listings([{'sku': f"SKU{i:07d}", 'title': 'Edited'} for i in range(100)], {})
+        db.write(pipeline.feedback_db, "DELETE FROM feedback WHERE id <= 50")
+        check(pipeline)
+        print("row_counts matches COUNT(*) after replace/delete")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+SQLite contention benchmark - many concurrent writers against one database,
+connect-per-operation with rollback journaling versus the pooled WAL layer
+
+Each writer process runs threads that mix the app's access pattern: a config
+read, a listing insert and a feedback count per "rerun". Reports reruns/s and
+how many operations failed with "database is locked".
+
+Usage: python benchmarks/bench_db_contention.py [--processes 8] [--threads 2] [--ops 200]
+"""
+
+import argparse
+import multiprocessing
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS config (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS listings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sku TEXT UNIQUE,
+        title TEXT,
+        description TEXT,
+        price REAL
+    );
+    INSERT OR IGNORE INTO config (key, value) VALUES ('title_formula', '[Brand] [Product_Type]');
+"""
+# The old helpers relied on sqlite3's default 5s timeout and no retry
+LEGACY_TIMEOUT = 5.0
+DESCRIPTION = "x" * 800
+
+
+def legacy_rerun(db_path, sku):
+    conn = sqlite3.connect(db_path, timeout=LEGACY_TIMEOUT)
+    conn.execute("SELECT value FROM config WHERE key = ?", ('title_formula',)).fetchone()
+    conn.close()
+
+    conn = sqlite3.connect(db_path, timeout=LEGACY_TIMEOUT)
+    conn.execute("INSERT INTO listings (sku, title, description, price) VALUES (?, ?, ?, ?)",
+                 (sku, 'Title', DESCRIPTION, 9.99))
+    conn.commit()
+    conn.close()
+
+    conn = sqlite3.connect(db_path, timeout=LEGACY_TIMEOUT)
+    conn.execute("SELECT COUNT(*) FROM listings").fetchone()
+    conn.close()
+
+
+def pooled_rerun(db_path, sku):
+    db.read_one(db_path, "SELECT value FROM config WHERE key = ?", ('title_formula',))
+    db.write(db_path, "INSERT INTO listings (sku, title, description, price) VALUES (?, ?, ?, ?)",
+             (sku, 'Title', DESCRIPTION, 9.99))
+    db.read_one(db_path, "SELECT COUNT(*) FROM listings")
+
+
+def writer(mode, db_path, worker_id, threads, ops, results):
+    rerun = pooled_rerun if mode == 'pooled' else legacy_rerun
+    errors = [0] * threads
+
+    def run(thread_id):
+        for i in range(ops):
+            try:
+                rerun(db_path, f"SKU-{worker_id}-{thread_id}-{i}")
+            except sqlite3.OperationalError:
+                errors[thread_id] += 1
+
+    workers = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    results.put(sum(errors))
+
+
+def run_mode(mode, processes, threads, ops):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / f"{mode}.db")
+        if mode == 'pooled':
+            db.execute_script(db_path, SCHEMA)
+            db.close_all()
+        else:
+            conn = sqlite3.connect(db_path)
+            conn.executescript(SCHEMA)
+            conn.close()
+
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=writer, args=(mode, db_path, p, threads, ops, results))
+            for p in range(processes)
+        ]
+        start = time.perf_counter()
+        for proc in procs:
+            proc.start()
+        errors = sum(results.get() for _ in procs)
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - start
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+        conn.close()
+    return rows / elapsed, errors, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--ops', type=int, default=200, help="reruns per thread")
+    args = parser.parse_args()
+
+    total = args.processes * args.threads * args.ops
+    print(f"{args.processes} processes x {args.threads} threads x {args.ops} reruns = {total} writes")
+    print(f"{'mode':>8} {'reruns/s':>10} {'written':>9} {'lock errors':>12}")
+    for mode in ('legacy', 'pooled'):
+        rate, errors, rows = run_mode(mode, args.processes, args.threads, args.ops)
+        print(f"{mode:>8} {rate:>10.0f} {rows:>9} {errors:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Export benchmark - full-catalog CSV export, read_sql_query + to_csv versus
+the chunked streaming exporter, time and peak Python heap (tracemalloc)
+
+Usage: python benchmarks/bench_export.py [--rows 200000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+import db  # noqa: E402
+from listing_export import export_listings  # noqa: E402
+from listing_pipeline import ListingPipeline  # noqa: E402
+
+DESCRIPTION = "Warm wool sweater with a relaxed fit, ribbed cuffs and hem. Light wear, no holes or stains. " * 8
+
+
+def legacy_export(db_path):
+    with db.connect(db_path) as conn:
+        df = pd.read_sql_query(
+            "SELECT sku, title, description, price, category, brand, size, color, condition FROM listings",
+            conn
+        )
+    return df.to_csv(index=False)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = ListingPipeline(tmp)
+        pipeline.init_database()
+        pipeline.save_listings((
+            {'sku': f"SKU{i:07d}", 'title': f"Pendleton Wool Sweater Size M Blue Used #{i}", 'description': DESCRIPTION,
+             'price': 24.99, 'category': 'Sweaters', 'brand': 'Pendleton', 'size': 'M', 'color': 'Blue',
+             'condition': 'Used', 'material': 'Wool'}
+            for i in range(args.rows)
+        ), {})
+
+        print(f"{args.rows} listings")
+        print(f"{'exporter':>22} {'seconds':>8} {'peak heap MB':>13}")
+        elapsed, peak = measure(lambda: legacy_export(pipeline.feedback_db))
+        print(f"{'read_sql + to_csv':>22} {elapsed:>8.2f} {peak:>13.1f}")
+        for layout in ('csv', 'ebay'):
+            elapsed, peak = measure(lambda: export_listings(pipeline.feedback_db, Path(tmp) / "exports", layout))
+            print(f"{'streaming ' + layout:>22} {elapsed:>8.2f} {peak:>13.1f}")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
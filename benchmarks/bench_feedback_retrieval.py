@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Feedback retrieval benchmark - prompt-building lookup at large feedback
+tables, the old unindexed "10 most recent" query versus feedback_index
+
+Also checks that the trigger-maintained patterns match a GROUP BY over
+feedback after updates and deletes.
+
+Usage: python benchmarks/bench_feedback_retrieval.py [--rows 1000000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+import feedback_index  # noqa: E402
+from edit_tracker import FEEDBACK_FIELDS  # noqa: E402
+from listing_pipeline import ListingPipeline  # noqa: E402
+
+PRODUCT_TYPES = [f"Type {i}" for i in range(200)]
+QUERIES = 500
+CHUNK = 50000
+
+
+def fill(pipeline, rows, rng):
+    for start in range(0, rows, CHUNK):
+        db.write_many(pipeline.feedback_db, """
+            INSERT INTO feedback (sku, field_name, original_value, corrected_value, product_type)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            (f"SKU{i}", rng.choice(FEEDBACK_FIELDS), f"value {rng.randrange(300)}",
+             f"fixed {rng.randrange(30)}", rng.choice(PRODUCT_TYPES))
+            for i in range(start, min(rows, start + CHUNK))
+        ))
+
+
+def per_query_ms(fn):
+    start = time.perf_counter()
+    for _ in range(QUERIES):
+        fn()
+    return (time.perf_counter() - start) / QUERIES * 1000
+
+
+def legacy_query(path):
+    return db.read(path, """
+        SELECT field_name, original_value, corrected_value, product_type
+        FROM feedback NOT INDEXED
+        ORDER BY timestamp DESC
+        LIMIT 10
+    """)
+
+
+def check(path):
+    expected = sorted(db.read(path, """
+        SELECT product_type, field_name, original_value, corrected_value, COUNT(*)
+        FROM feedback GROUP BY 1, 2, 3, 4
+    """))
+    actual = sorted(db.read(path, """
+        SELECT product_type, field_name, original_value, corrected_value, weight FROM feedback_patterns
+    """))
+    assert expected == actual, "feedback_patterns out of sync with feedback"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = ListingPipeline(tmp)
+        pipeline.init_database()
+        start = time.perf_counter()
+        fill(pipeline, args.rows, rng)
+        print(f"inserted {args.rows} feedback rows in {time.perf_counter() - start:.1f}s (triggers included)")
+        patterns = db.read_one(pipeline.feedback_db, "SELECT COUNT(*) FROM feedback_patterns")[0]
+        print(f"{patterns} distinct patterns")
+
+        path = pipeline.feedback_db
+        print(f"recent-10 scan:        {per_query_ms(lambda: legacy_query(path)):8.3f} ms/query")
+        print(f"ranked, any type:      {per_query_ms(lambda: feedback_index.relevant_feedback(path)):8.3f} ms/query")
+        print(f"ranked, product type:  "
+              f"{per_query_ms(lambda: feedback_index.relevant_feedback(path, rng.choice(PRODUCT_TYPES))):8.3f} ms/query")
+
+        db.write(path, "UPDATE feedback SET corrected_value = 'changed' WHERE id % 97 = 0")
+        db.write(path, "DELETE FROM feedback WHERE id % 89 = 0")
+        check(path)
+        print("feedback_patterns matches GROUP BY after updates and deletes")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Gemini client benchmark - per-request setup cost of genai.configure +
+GenerativeModel (plus the service client it builds lazily on first use)
+versus the GeminiClients registry, and key mix-ups under concurrency
+
+No network calls are made: the measured cost is everything before
+generate_content sends a request. The concurrency check runs threads for
+two API keys and counts models whose client carries the other user's key.
+
+Usage: python benchmarks/bench_gemini_clients.py [--calls 200] [--threads 8]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import google.generativeai as genai  # noqa: E402
+from google.generativeai import client as genai_client  # noqa: E402
+
+from gemini_client import GeminiClients  # noqa: E402
+
+MODEL = 'gemini-1.5-flash'
+KEYS = ['key-user-a', 'key-user-b']
+
+
+def legacy_model(api_key):
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(MODEL)
+    # What generate_content does on first use of a fresh model
+    model._client = genai_client.get_default_generative_client()
+    return model
+
+
+def client_key(model):
+    return model._client._transport._credentials.token
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(KEYS[i % 2])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def mixups(fn, threads, calls):
+    wrong = [0]
+    lock = threading.Lock()
+
+    def run(api_key):
+        for _ in range(calls):
+            if client_key(fn(api_key)) != api_key:
+                with lock:
+                    wrong[0] += 1
+
+    workers = [threading.Thread(target=run, args=(KEYS[t % 2],)) for t in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return wrong[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    clients = GeminiClients()
+    print(f"{'setup':>22} {'us/request':>11} {'wrong-key models':>17}")
+    legacy_us = per_call_us(legacy_model, args.calls)
+    legacy_wrong = mixups(legacy_model, args.threads, args.calls)
+    print(f"{'configure + model':>22} {legacy_us:>11.1f} {legacy_wrong:>17}")
+
+    registry = lambda api_key: clients.model(api_key, MODEL)  # noqa: E731
+    registry_us = per_call_us(registry, args.calls)
+    registry_wrong = mixups(registry, args.threads, args.calls)
+    print(f"{'GeminiClients.model':>22} {registry_us:>11.1f} {registry_wrong:>17}")
+    print(f"{args.threads * args.calls} concurrent requests checked per row; {clients.created} models created")
+
+
+if __name__ == "__main__":
+    main()
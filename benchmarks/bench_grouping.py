@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Grouping benchmark - dHash + Hamming clustering on synthetic photo sets
+
+Each synthetic item is a random smooth image; its "photos" are variants
+with shifted brightness, a small crop, sensor noise and JPEG recompression.
+Reports hashing and clustering time and how well groups match items.
+
+Usage: python benchmarks/bench_grouping.py [--items 1000] [--variants 5]
+"""
+
+import argparse
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from photo_grouping import GROUPING_THRESHOLD, dhash, suggest_groups  # noqa: E402
+
+SIZE = 256
+
+
+def make_item(rng):
+    """Random low-frequency image, like a product on a plain backdrop"""
+    coarse = rng.integers(0, 256, size=(6, 6, 3), dtype=np.uint8)
+    return Image.fromarray(coarse).resize((SIZE, SIZE), Image.Resampling.BICUBIC)
+
+
+def make_variant(image, rng):
+    crop = int(rng.integers(0, 12))
+    variant = image.crop((crop, crop, SIZE - crop, SIZE - crop)).resize((SIZE, SIZE))
+    variant = ImageEnhance.Brightness(variant).enhance(float(rng.uniform(0.85, 1.15)))
+    noisy = np.asarray(variant, dtype=np.int16) + rng.integers(-8, 9, size=(SIZE, SIZE, 3))
+    variant = Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8))
+    buf = io.BytesIO()
+    variant.save(buf, format='JPEG', quality=int(rng.integers(60, 95)))
+    decoded = Image.open(io.BytesIO(buf.getvalue()))
+    decoded.load()
+    return decoded
+
+
+def build_set(items, variants, seed):
+    rng = np.random.default_rng(seed)
+    photos, labels = [], []
+    for item in range(items):
+        base = make_item(rng)
+        for _ in range(variants):
+            photos.append(make_variant(base, rng))
+            labels.append(item)
+    # Uploads rarely arrive grouped - shuffle like a camera roll export
+    order = list(range(len(photos)))
+    random.Random(seed).shuffle(order)
+    return [photos[i] for i in order], [labels[i] for i in order]
+
+
+def pair_scores(groups, labels):
+    """Pairwise precision/recall of suggested groups against true items"""
+    predicted = set()
+    for members in groups:
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                predicted.add((members[a], members[b]))
+
+    by_item = {}
+    for idx, label in enumerate(labels):
+        by_item.setdefault(label, []).append(idx)
+    actual = set()
+    for members in by_item.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                actual.add((members[a], members[b]))
+
+    correct = len(predicted & actual)
+    precision = correct / len(predicted) if predicted else 0.0
+    recall = correct / len(actual) if actual else 0.0
+    return precision, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--variants', type=int, default=5)
+    parser.add_argument('--threshold', type=int, default=GROUPING_THRESHOLD)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    total = args.items * args.variants
+    print(f"Generating {total} photos ({args.items} items x {args.variants} variants)...")
+    photos, labels = build_set(args.items, args.variants, args.seed)
+
+    start = time.perf_counter()
+    hashes = [dhash(photo) for photo in photos]
+    hash_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    groups = suggest_groups(hashes, threshold=args.threshold)
+    group_time = time.perf_counter() - start
+
+    precision, recall = pair_scores(groups, labels)
+    print(f"dHash:       {hash_time:7.3f}s  ({total / hash_time:,.0f} photos/s, from decoded thumbnails)")
+    print(f"Clustering:  {group_time:7.3f}s  ({total * (total - 1) // 2:,} pairs compared)")
+    print(f"Groups:      {len(groups)} suggested for {args.items} items")
+    print(f"Pairwise precision {precision:.1%}, recall {recall:.1%} at threshold {args.threshold}")
+
+
+if __name__ == "__main__":
+    main()
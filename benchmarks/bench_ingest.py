@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Ingestion benchmark - photos/sec for the serial full-resolution decode
+versus the parallel draft-mode pipeline in image_pipeline.py
+
+Usage: python benchmarks/bench_ingest.py [--photos 40] [--width 4032] [--height 3024]
+"""
+
+import argparse
+import hashlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from image_pipeline import default_workers, ingest_photos  # noqa: E402
+from photo_store import PhotoStore  # noqa: E402
+
+
+def legacy_process(uploads):
+    """The original serial implementation from app.process_uploaded_files"""
+    photos = []
+    for name, image_bytes in uploads:
+        image = Image.open(io.BytesIO(image_bytes))
+
+        thumbnail = image.copy()
+        thumbnail.thumbnail((300, 300))
+        thumb_io = io.BytesIO()
+        thumbnail.save(thumb_io, format='JPEG')
+
+        photos.append({
+            'name': name,
+            'hash': hashlib.md5(image_bytes).hexdigest()[:12],
+            'image_bytes': image_bytes,
+            'thumbnail_bytes': thumb_io.getvalue(),
+            'assigned': False
+        })
+    return photos
+
+
+def make_photos(count, width, height):
+    """Generate distinct camera-sized JPEGs"""
+    uploads = []
+    for idx in range(count):
+        channels = [Image.effect_noise((width, height), 40 + idx % 20) for _ in range(3)]
+        image = Image.merge('RGB', channels)
+        buf = io.BytesIO()
+        image.save(buf, format='JPEG', quality=90)
+        uploads.append((f"IMG_{idx:04d}.jpg", buf.getvalue()))
+    return uploads
+
+
+def as_files(uploads):
+    """Wrap (name, bytes) pairs as named file objects, like Streamlit's UploadedFile"""
+    files = []
+    for name, data in uploads:
+        f = io.BytesIO(data)
+        f.name = name
+        files.append(f)
+    return files
+
+
+def pipeline(workers):
+    """Run ingest_photos into a fresh store so every run decodes from scratch"""
+    def run(uploads):
+        with tempfile.TemporaryDirectory() as tmp:
+            return ingest_photos(as_files(uploads), PhotoStore(tmp), max_workers=workers)
+    return run
+
+
+def timed(label, fn, uploads):
+    start = time.perf_counter()
+    photos = fn(uploads)
+    elapsed = time.perf_counter() - start
+    rate = len(photos) / elapsed
+    print(f"{label:<28} {elapsed:8.2f}s  {rate:8.1f} photos/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--photos', type=int, default=40)
+    parser.add_argument('--width', type=int, default=4032)
+    parser.add_argument('--height', type=int, default=3024)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"Generating {args.photos} {args.width}x{args.height} JPEGs...")
+    uploads = make_photos(args.photos, args.width, args.height)
+    workers = args.workers or default_workers()
+
+    baseline = timed("legacy serial", legacy_process, uploads)
+    serial = timed("draft mode, 1 worker", pipeline(1), uploads)
+    parallel = timed(f"draft mode, {workers} workers", pipeline(workers), uploads)
+
+    print(f"\nSpeedup: {serial / baseline:.1f}x (draft only), {parallel / baseline:.1f}x (draft + parallel)")
+
+
+if __name__ == "__main__":
+    main()
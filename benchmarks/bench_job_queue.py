@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+AI job queue benchmark - a batch processed by ai_worker processes through the
+SQLite job queue, versus process_groups inside one script run, including a
+worker killed mid-batch
+
+The in-script run loses everything not yet returned when the tab closes or
+the script reruns; with the queue every finished listing is already in the
+database and a killed worker's jobs are picked up by the others.
+
+Usage: python benchmarks/bench_job_queue.py [--skus 200] [--latency 0.2] [--workers 2] [--stale 3]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import ai_worker  # noqa: E402
+import db  # noqa: E402
+import job_queue  # noqa: E402
+from bench_pipeline import make_uploads  # noqa: E402
+from fake_gemini import FakeGemini  # noqa: E402
+from listing_pipeline import ListingPipeline  # noqa: E402
+
+
+def setup(tmp, skus, concurrency):
+    data_dir = Path(tmp)
+    config = {'gemini_api_key': 'bench-key', 'title_formula': '[Brand] [Product_Type]', 'pricing_rules': [],
+              'max_concurrent_requests': concurrency, 'request_retries': 0, 'ai_cache_bypass': True}
+    (data_dir / "config.json").write_text(json.dumps(config))
+    pipeline = ListingPipeline(data_dir)
+    pipeline.init_database()
+    photos = pipeline.ingest(make_uploads(skus, (640, 480), seed=7))
+    return pipeline, config, {f"SKU{i:05d}": [photo['hash']] for i, photo in enumerate(photos)}
+
+
+def start_worker(data_dir, latency, idle_exit):
+    # Forked workers must not inherit the parent's open SQLite connections
+    db.close_all()
+    worker = multiprocessing.Process(target=ai_worker.run_worker,
+                                     args=(data_dir, idle_exit, FakeGemini(latency=latency, jitter=0.3)))
+    worker.start()
+    return worker
+
+
+def wait_for(queue, batch_id, done_at=None):
+    while True:
+        progress = queue.progress(batch_id)
+        finished = progress['done'] + progress['failed']
+        if finished == progress['total'] or (done_at is not None and finished >= done_at):
+            return progress
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--skus', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--concurrency', type=int, default=8, help="parallel requests per process")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--stale', type=float, default=3.0, help="seconds before a silent worker is presumed dead")
+    args = parser.parse_args()
+
+    # Shorter than production so the kill test doesn't wait 30s; inherited by forked workers
+    job_queue.WORKER_STALE_SECONDS = args.stale
+    ai_worker.HEARTBEAT_SECONDS = args.stale / 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline, config, groups = setup(tmp, args.skus, args.concurrency)
+        queue = job_queue.JobQueue(pipeline.feedback_db)
+        print(f"{args.skus} SKUs, {args.latency}s fake Gemini latency, {args.concurrency} requests per process")
+        print(f"{'mode':>28} {'time (s)':>9} {'listings/s':>11} {'saved':>6} {'re-run':>7}")
+
+        in_script = ListingPipeline(tmp, FakeGemini(latency=args.latency, jitter=0.3))
+        tasks = [(sku, [{'hash': h} for h in hashes]) for sku, hashes in groups.items()]
+        start = time.perf_counter()
+        in_script.process_groups(tasks, config)
+        elapsed = time.perf_counter() - start
+        # Nothing is stored until the page moves on; a closed tab keeps 0 of them
+        print(f"{'in-script process_groups':>28} {elapsed:>9.2f} {args.skus / elapsed:>11.1f} {0:>6} {'-':>7}")
+
+        for workers, kill in ((1, False), (args.workers, False), (args.workers, True)):
+            batch_id = queue.submit(groups, config)
+            start = time.perf_counter()
+            # Survivors must outlast the stale timeout to pick up the killed worker's jobs
+            procs = [start_worker(tmp, args.latency, args.stale * 2) for _ in range(workers)]
+            if kill:
+                wait_for(queue, batch_id, done_at=args.skus // 3)
+                os.kill(procs[0].pid, signal.SIGKILL)
+                procs[0].join()
+            progress = wait_for(queue, batch_id)
+            elapsed = time.perf_counter() - start
+            for proc in procs:
+                proc.join()
+
+            rerun = db.read_one(pipeline.feedback_db, "SELECT SUM(attempts) - COUNT(*) FROM ai_jobs WHERE batch_id = ?",
+                                (batch_id,))[0]
+            results, _ = queue.results(batch_id)
+            assert len(results) == args.skus and progress['failed'] == 0
+            label = f"queue, {workers} worker{'s' if workers > 1 else ''}" + (", 1 killed" if kill else "")
+            print(f"{label:>28} {elapsed:>9.2f} {args.skus / elapsed:>11.1f} {len(results):>6} {rerun:>7}")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+End-to-end batch benchmark - uploaded photos to saved listings
+Drives ListingPipeline (the code behind app.py's pages) against the local
+FakeGemini stand-in and reports throughput, p50/p95/p99 latency per stage
+and peak memory for batches of 10, 100 and 1,000 SKUs.
+
+Usage: python benchmarks/bench_pipeline.py [--skus 10 100 1000] [--latency 0.2]
+       [--error-rate 0.02] [--response-chars 1500] [--concurrency 8]
+"""
+
+import argparse
+import io
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import image_pipeline  # noqa: E402
+from fake_gemini import FakeGemini  # noqa: E402
+from listing_pipeline import ListingPipeline  # noqa: E402
+from photo_grouping import suggest_groups  # noqa: E402
+from photo_registry import PhotoRegistry  # noqa: E402
+
+
+class Timings:
+    """Per-item latencies collected from instrumented calls"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+        return timed
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_uploads(count, size, seed):
+    """Distinct photo-like JPEGs wrapped as named file objects, like Streamlit's UploadedFile"""
+    uploads = []
+    for idx in range(count):
+        # Upscaled low-res noise: smooth, distinct images that compress like photos
+        channels = [Image.effect_noise((32, 24), 60 + (seed + idx + c) % 40) for c in range(3)]
+        image = Image.merge('RGB', channels).resize(size, Image.Resampling.BICUBIC)
+        buf = io.BytesIO()
+        image.save(buf, format='JPEG', quality=85)
+        upload = io.BytesIO(buf.getvalue())
+        upload.name = f"IMG_{idx:05d}.jpg"
+        uploads.append(upload)
+    return uploads
+
+
+def run_batch(sku_count, args):
+    fake = FakeGemini(latency=args.latency, error_rate=args.error_rate,
+                      response_chars=args.response_chars, seed=sku_count)
+    config = {
+        'gemini_api_key': 'fake-key',
+        'max_concurrent_requests': args.concurrency,
+        'request_timeout': max(10, args.latency * 20),
+        'request_retries': 3,
+        'ai_cache_bypass': True,
+    }
+    timings = Timings()
+    stage_wall = {}
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        pipeline = ListingPipeline(data_dir, genai_module=fake)
+        pipeline.init_database()
+        uploads = make_uploads(sku_count * args.photos_per_sku, (args.photo_width, args.photo_height), sku_count)
+
+        # Stage 1: ingestion (hash/store pass and decode/thumbnail pass timed per photo)
+        original = (image_pipeline.hash_upload, image_pipeline.decode_stored_photo)
+        image_pipeline.hash_upload = timings.wrap('ingest.hash', original[0])
+        image_pipeline.decode_stored_photo = timings.wrap('ingest.decode', original[1])
+        try:
+            start = time.perf_counter()
+            photos = pipeline.ingest(uploads)
+            stage_wall['ingest'] = (time.perf_counter() - start, len(photos))
+        finally:
+            image_pipeline.hash_upload, image_pipeline.decode_stored_photo = original
+        rss_after = {'ingest': peak_rss_mb()}
+
+        # Stage 2: grouping - suggestions plus assigning each SKU's photos
+        start = time.perf_counter()
+        registry = PhotoRegistry(photos)
+        suggest_groups([p['dhash'] for p in photos])
+        assign = timings.wrap('group.assign', registry.assign)
+        for sku_idx in range(sku_count):
+            first = sku_idx * args.photos_per_sku
+            assign(f"SKU{sku_idx:05d}", [p['hash'] for p in photos[first:first + args.photos_per_sku]])
+        stage_wall['group'] = (time.perf_counter() - start, sku_count)
+        rss_after['group'] = peak_rss_mb()
+
+        # Stage 3: AI processing through the concurrent engine
+        pipeline.request_listing = timings.wrap('ai.request', pipeline.request_listing)
+        tasks = [(sku, registry.records(hashes)) for sku, hashes in registry.groups.items()]
+        start = time.perf_counter()
+        results, errors = pipeline.process_groups(tasks, config)
+        stage_wall['ai'] = (time.perf_counter() - start, len(results))
+        rss_after['ai'] = peak_rss_mb()
+
+        # Stage 4: listings save
+        rows = [dict(results[sku], sku=sku) for sku in results]
+        save = timings.wrap('save.batch', pipeline.save_listings)
+        start = time.perf_counter()
+        save(rows, registry.groups)
+        stage_wall['save'] = (time.perf_counter() - start, len(rows))
+        rss_after['save'] = peak_rss_mb()
+
+    print(f"\n=== {sku_count} SKUs ({sku_count * args.photos_per_sku} photos) ===")
+    print(f"{'stage':<14} {'wall s':>8} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak RSS MB':>12}")
+    stage_samples = {
+        'ingest': ['ingest.hash', 'ingest.decode'],
+        'group': ['group.assign'],
+        'ai': ['ai.request'],
+        'save': ['save.batch'],
+    }
+    total = 0.0
+    for stage, (wall, items) in stage_wall.items():
+        total += wall
+        print(f"{stage:<14} {wall:>8.2f} {items / wall if wall else float('inf'):>10.1f} {'':>9} {'':>9} {'':>9} {rss_after[stage]:>12.1f}")
+        for name in stage_samples[stage]:
+            values = sorted(timings.samples[name])
+            print(f"  {name:<12} {'':>8} {'':>10} "
+                  f"{percentile(values, 50) * 1000:>9.2f} {percentile(values, 95) * 1000:>9.2f} "
+                  f"{percentile(values, 99) * 1000:>9.2f}")
+    print(f"{'total':<14} {total:>8.2f} {sku_count / total:>10.1f} SKUs/s end to end")
+    print(f"Gemini calls: {fake.calls} ({fake.errors} simulated errors, {len(errors)} SKUs failed after retries), "
+          f"{fake.bytes_received / 1e6:.1f} MB sent")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--skus', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--photos-per-sku', type=int, default=3)
+    parser.add_argument('--photo-width', type=int, default=1024)
+    parser.add_argument('--photo-height', type=int, default=768)
+    parser.add_argument('--latency', type=float, default=0.2, help="Mean fake Gemini latency (s)")
+    parser.add_argument('--error-rate', type=float, default=0.02, help="Fraction of calls that fail")
+    parser.add_argument('--response-chars', type=int, default=1500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    for sku_count in args.skus:
+        run_batch(sku_count, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Prompt benchmark - per-SKU prompt construction for one batch, rebuilding
+the whole prompt per SKU versus the compiled template (looked up per SKU,
+and compiled once per batch as process_groups does)
+
+Also checks that a feedback change invalidates the compiled prompt.
+
+Usage: python benchmarks/bench_prompt.py [--skus 1000] [--feedback 100000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from edit_tracker import FEEDBACK_FIELDS  # noqa: E402
+from listing_pipeline import ListingPipeline  # noqa: E402
+
+CONFIG = {
+    'title_formula': '[Brand] [Product_Type] Size [Size] [Color] [Condition]',
+    'pricing_rules': [{'condition': f"brand is Brand{i}", 'price': 10 + i} for i in range(20)],
+    'product_type': 'Sweater',
+}
+
+
+def rebuild(pipeline, sku):
+    head, tail = pipeline._render_prompt(CONFIG, CONFIG['product_type'])
+    return head + sku + tail
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--skus', type=int, default=1000)
+    parser.add_argument('--feedback', type=int, default=100000)
+    args = parser.parse_args()
+    rng = random.Random(5)
+    skus = [f"SKU{i:06d}" for i in range(args.skus)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = ListingPipeline(tmp)
+        pipeline.init_database()
+        db.write_many(pipeline.feedback_db, """
+            INSERT INTO feedback (sku, field_name, original_value, corrected_value, product_type)
+            VALUES (?, ?, ?, ?, ?)
+        """, ((f"OLD{i}", rng.choice(FEEDBACK_FIELDS), f"value {rng.randrange(300)}", f"fixed {rng.randrange(30)}",
+               rng.choice(['Sweater', 'Jacket', 'Shoes'])) for i in range(args.feedback)))
+
+        start = time.perf_counter()
+        rebuilt = [rebuild(pipeline, sku) for sku in skus]
+        rebuild_us = (time.perf_counter() - start) / len(skus) * 1e6
+
+        start = time.perf_counter()
+        compiled = [pipeline.build_prompt(sku, CONFIG) for sku in skus]
+        compiled_us = (time.perf_counter() - start) / len(skus) * 1e6
+        assert rebuilt == compiled
+
+        start = time.perf_counter()
+        head, tail = pipeline.compile_prompt(CONFIG)
+        batch = [head + sku + tail for sku in skus]
+        batch_us = (time.perf_counter() - start) / len(skus) * 1e6
+        assert rebuilt == batch
+
+        print(f"{args.skus} SKUs, {args.feedback} feedback rows")
+        print(f"rebuild per SKU:          {rebuild_us:8.1f} us/SKU")
+        print(f"compiled, per-SKU lookup: {compiled_us:8.1f} us/SKU")
+        print(f"compiled once per batch:  {batch_us:8.2f} us/SKU")
+
+        before = pipeline.build_prompt(skus[0], CONFIG)
+        for _ in range(50):
+            pipeline.record_feedback([("NEW", 'Brand', 'Unknown', 'Pendleton', 'Sweater')])
+            db.write(pipeline.feedback_db, "DELETE FROM feedback WHERE sku = 'NEW'")
+        pipeline.record_feedback([(f"NEW{i}", 'Brand', 'Unknown', 'Pendleton', 'Sweater') for i in range(500)])
+        assert pipeline.build_prompt(skus[0], CONFIG) != before, "feedback change did not invalidate the prompt"
+        print("feedback change invalidates the compiled prompt")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
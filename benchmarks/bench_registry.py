@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Registry microbenchmark - per-photo cost of the SKU assignment workflow
+for the old list-based session state versus PhotoRegistry
+
+Simulates one batch: build the grid view, assign SKUs five photos at a
+time (re-rendering the grid after each, as the page does), then look up
+each SKU's photos for AI processing.
+
+Usage: python benchmarks/bench_registry.py [--sizes 100 1000 5000 10000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from photo_registry import PhotoRegistry  # noqa: E402
+
+GROUP_SIZE = 5
+# Reruns sampled per batch; rendering every rerun makes the list version unbearable at 10k
+RENDER_SAMPLES = 20
+
+
+def make_photos(n):
+    return [{'name': f"IMG_{i:05d}.jpg", 'hash': f"{i:064x}", 'assigned': False} for i in range(n)]
+
+
+def legacy_workflow(photos):
+    uploaded_photos = photos
+    unassigned_photos = [p['hash'] for p in photos]
+    photo_groups = {}
+    render_every = max(1, len(photos) // GROUP_SIZE // RENDER_SAMPLES)
+
+    for group_idx, start in enumerate(range(0, len(photos), GROUP_SIZE)):
+        if group_idx % render_every == 0:
+            [p for p in uploaded_photos if p['hash'] in unassigned_photos]
+        selected = {p['hash'] for p in photos[start:start + GROUP_SIZE]}
+        photo_groups[f"SKU{group_idx}"] = list(selected)
+        for photo_hash in selected:
+            unassigned_photos.remove(photo_hash)
+
+    for photo_hashes in photo_groups.values():
+        [p for p in uploaded_photos if p['hash'] in photo_hashes]
+
+
+def registry_workflow(photos):
+    registry = PhotoRegistry(photos)
+    render_every = max(1, len(photos) // GROUP_SIZE // RENDER_SAMPLES)
+
+    for group_idx, start in enumerate(range(0, len(photos), GROUP_SIZE)):
+        if group_idx % render_every == 0:
+            registry.unassigned()
+        selected = {p['hash'] for p in photos[start:start + GROUP_SIZE]}
+        registry.assign(f"SKU{group_idx}", selected)
+
+    for photo_hashes in registry.groups.values():
+        registry.records(photo_hashes)
+
+
+def per_photo_us(fn, n):
+    photos = make_photos(n)
+    start = time.perf_counter()
+    fn(photos)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'photos':>8} {'lists (us/photo)':>18} {'registry (us/photo)':>20}")
+    for n in args.sizes:
+        legacy = per_photo_us(legacy_workflow, n)
+        registry = per_photo_us(registry_workflow, n)
+        print(f"{n:>8} {legacy:>18.1f} {registry:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
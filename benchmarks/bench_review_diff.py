@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Review-table benchmark - per-rerun change detection and the "Save to
+Database" write for large batches, iterrows versus columnwise masks
+
+Each batch has 2% of its cells edited. The diff is what every rerun of the
+review page pays; the save is a second click after those edits (the first
+save wrote every row).
+
+Usage: python benchmarks/bench_review_diff.py [--sizes 1000 5000 20000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+import db  # noqa: E402
+from edit_tracker import FEEDBACK_FIELDS, EditTracker  # noqa: E402
+from listing_pipeline import ListingPipeline  # noqa: E402
+
+EDIT_FRACTION = 0.02
+
+
+def make_review_table(n):
+    return pd.DataFrame({
+        'SKU': [f"SKU{i:06d}" for i in range(n)],
+        'Title': [f"Vintage Wool Sweater Size M Blue Used #{i}" for i in range(n)],
+        'Price': [19.99 + i % 50 for i in range(n)],
+        'Category': ['Sweaters'] * n,
+        'Brand': ['Pendleton'] * n,
+        'Material': ['Wool'] * n,
+        'Size': ['M'] * n,
+        'Color': ['Blue'] * n,
+        'Condition': ['Used'] * n,
+        'Description': ["Warm and soft. " * 30] * n,
+    })
+
+
+def edit(df, rng):
+    edited = df.copy()
+    for _ in range(int(len(df) * len(FEEDBACK_FIELDS) * EDIT_FRACTION)):
+        row = rng.randrange(len(df))
+        field = rng.choice(FEEDBACK_FIELDS)
+        edited.loc[row, field] = edited.loc[row, field] * 2 if field == 'Price' else f"{edited.loc[row, field]} (fixed)"
+    return edited
+
+
+def legacy_diff(df, edited_df):
+    changes = []
+    for idx, row in edited_df.iterrows():
+        original_row = df.iloc[idx]
+        for field in FEEDBACK_FIELDS:
+            if row[field] != original_row[field]:
+                changes.append((field, str(original_row[field]), str(row[field]), row.get('Category', 'Unknown')))
+    return changes
+
+
+def legacy_save(pipeline, edited_df):
+    with db.transaction(pipeline.feedback_db) as conn:
+        for _, row in edited_df.iterrows():
+            conn.execute("""
+                INSERT OR REPLACE INTO listings
+                (sku, title, description, price, category, material, size, color, condition, brand, photos)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (row['SKU'], row['Title'], row['Description'], row['Price'], row['Category'],
+                  row['Material'], row['Size'], row['Color'], row['Condition'], row['Brand'], '[]'))
+
+
+def tracked_save(pipeline, tracker, edited_df):
+    changed = tracker.unsaved(edited_df)
+    pipeline.save_listings(changed.rename(columns=str.lower).to_dict('records'), {})
+    tracker.mark_saved(edited_df)
+    return len(changed)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    print(f"{'SKUs':>6} {'diff iterrows':>14} {'diff masks':>11} {'save all rows':>14} {'save changed':>13} {'rows':>6}")
+    for n in args.sizes:
+        df = make_review_table(n)
+        edited_df = edit(df, rng)
+
+        legacy_ms, legacy_changes = timed(lambda: legacy_diff(df, edited_df))
+        tracker = EditTracker()
+        mask_ms, (corrections, _) = timed(lambda: tracker.pending(df, edited_df))
+        assert len(corrections) == len(legacy_changes), (len(corrections), len(legacy_changes))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline = ListingPipeline(tmp)
+            pipeline.init_database()
+            tracked_save(pipeline, tracker, df)
+            legacy_save_ms, _ = timed(lambda: legacy_save(pipeline, edited_df))
+            tracked_save(pipeline, tracker, df)
+            save_ms, rows = timed(lambda: tracked_save(pipeline, tracker, edited_df))
+            db.close_all()
+
+        print(f"{n:>6} {legacy_ms:>12.0f}ms {mask_ms:>9.1f}ms {legacy_save_ms:>12.0f}ms {save_ms:>11.1f}ms {rows:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+SKU allocation stress test - several processes saving chat listings into
+one chat_listings.db at once, legacy SKU{int(time.time())} versus SkuAllocator
+
+Every worker inserts rows into a UNIQUE sku column; lost saves are the
+inserts rejected as duplicates. Also reports raw allocations per second
+for a few block sizes.
+
+Usage: python benchmarks/bench_sku_allocator.py [--processes 4] [--saves 500] [--allocations 20000]
+"""
+
+import argparse
+import multiprocessing
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from sku_allocator import SkuAllocator  # noqa: E402
+
+
+def legacy_sku():
+    return f"SKU{int(time.time())}"
+
+
+def save_worker(args):
+    path, mode, saves, block_size = args
+    allocate = SkuAllocator(path, block_size=block_size).allocate if mode == 'allocator' else legacy_sku
+    lost = 0
+    for i in range(saves):
+        try:
+            sku = allocate()
+            db.write(path, "INSERT INTO listings (sku, title) VALUES (?, ?)", (sku, f"Item {i}"))
+        except sqlite3.IntegrityError:
+            lost += 1
+    db.close_all()
+    return lost
+
+
+def allocate_worker(args):
+    path, count, block_size = args
+    allocator = SkuAllocator(path, block_size=block_size)
+    skus = [allocator.allocate() for _ in range(count)]
+    db.close_all()
+    return skus
+
+
+def fresh_db(tmp, name):
+    path = Path(tmp) / f"{name}.db"
+    db.execute_script(path, """
+        CREATE TABLE listings (id INTEGER PRIMARY KEY AUTOINCREMENT, sku TEXT UNIQUE, title TEXT);
+    """)
+    SkuAllocator(path)
+    db.close_all()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--saves', type=int, default=500)
+    parser.add_argument('--allocations', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, multiprocessing.Pool(args.processes) as pool:
+        print(f"{args.processes} processes x {args.saves} listing saves")
+        print(f"{'mode':>10} {'saved':>7} {'lost':>6} {'saves/s':>9}")
+        for mode in ('legacy', 'allocator'):
+            path = fresh_db(tmp, mode)
+            start = time.perf_counter()
+            lost = sum(pool.map(save_worker, [(path, mode, args.saves, 32)] * args.processes))
+            elapsed = time.perf_counter() - start
+            saved = db.read_one(path, "SELECT COUNT(*) FROM listings")[0]
+            print(f"{mode:>10} {saved:>7} {lost:>6} {saved / elapsed:>9.0f}")
+
+        per_process = args.allocations // args.processes
+        print(f"\n{args.processes} processes x {per_process} allocations")
+        print(f"{'block':>6} {'alloc/s':>10} {'unique':>7}")
+        for block_size in (1, 32, 256):
+            path = fresh_db(tmp, f"alloc{block_size}")
+            start = time.perf_counter()
+            results = pool.map(allocate_worker, [(path, per_process, block_size)] * args.processes)
+            elapsed = time.perf_counter() - start
+            skus = [sku for chunk in results for sku in chunk]
+            assert len(set(skus)) == len(skus), "duplicate SKU allocated"
+            print(f"{block_size:>6} {len(skus) / elapsed:>10.0f} {'yes':>7}")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
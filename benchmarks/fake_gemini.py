@@ -0,0 +1,87 @@
+"""
+Local stand-in for google.generativeai used by the benchmarks
+Same surface as the calls the app makes (configure, GenerativeModel,
+generate_content) with configurable latency, error rate and response size
+"""
+
+import json
+import random
+import threading
+import time
+
+
+class FakeAPIError(Exception):
+    """Raised for simulated transient API failures (e.g. 429/503)"""
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, backend: "FakeGemini", model_name: str):
+        self.backend = backend
+        self.model_name = model_name
+
+    def generate_content(self, contents, **kwargs):
+        return self.backend._respond(contents)
+
+
+class FakeGemini:
+    """Drop-in replacement for the genai module: pass as ListingPipeline(genai_module=...)"""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.5, error_rate: float = 0.0,
+                 response_chars: int = 1500, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.response_chars = response_chars
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.configure_calls = 0
+        self.bytes_received = 0
+
+    def configure(self, api_key=None, **kwargs):
+        with self._lock:
+            self.configure_calls += 1
+
+    def GenerativeModel(self, model_name, **kwargs):
+        return FakeModel(self, model_name)
+
+    def _respond(self, contents):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency * self._random.uniform(1 - self.jitter, 1 + self.jitter)
+            fail = self._random.random() < self.error_rate
+            self.bytes_received += sum(
+                len(part['data']) if isinstance(part, dict) else len(str(part)) for part in contents
+            )
+
+        # Sleeping releases the GIL like a real network wait would
+        time.sleep(max(0.0, delay))
+        if fail:
+            with self._lock:
+                self.errors += 1
+            raise FakeAPIError("503 Service Unavailable (simulated)")
+
+        listing = {
+            'title': "Nike Running Shoe Size 10 Blue Used",
+            'description': "",
+            'category': "Clothing, Shoes & Accessories > Men > Men's Shoes > Athletic Shoes",
+            'price': 39.99,
+            'brand': "Nike",
+            'product_type': "Running Shoe",
+            'material': "Mesh",
+            'size': "10",
+            'color': "Blue",
+            'condition': "Used",
+            'features': ["Breathable mesh", "Cushioned sole", "Lace-up"],
+            'item_specifics': {'Style': "Running"},
+        }
+        filler = len(json.dumps(listing))
+        listing['description'] = ("Lightly worn, clean uppers. " * (self.response_chars // 28 + 1))[
+            :max(0, self.response_chars - filler)]
+        return FakeResponse(json.dumps(listing))
@@ -0,0 +1,187 @@
+"""
+Chat photo analysis - per-photo observations cached by hash and merged into
+a running understanding of the product, so each upload only sends the
+photos the model hasn't seen yet
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import db
+from json_stream import stream_text
+
+MAX_PHOTOS_PER_CALL = 5
+
+# Asked when every new photo was already analyzed (e.g. the same shot sent again)
+DEFAULT_QUESTIONS = [
+    "What's the brand?",
+    "What size is it?",
+    "What's the condition? (New, Like New, Good, Fair)",
+    "Any defects or issues I should mention?",
+    "What price would you like?",
+]
+
+
+def empty_understanding() -> Dict:
+    """What the photos have shown so far for one product"""
+    return {'product_type': '', 'visible_details': [], 'condition_notes': [], 'photos': []}
+
+
+def _add_unique(items: List[str], new_items: Iterable[str]):
+    seen = {item.lower() for item in items}
+    for item in new_items:
+        item = str(item).strip()
+        if item and item.lower() not in seen:
+            seen.add(item.lower())
+            items.append(item)
+
+
+def merge_observations(understanding: Dict, photo_hashes: List[str], observations: List[Dict]) -> Dict:
+    """Fold per-photo observations into the running understanding (returns a new dict)"""
+    merged = {
+        'product_type': understanding.get('product_type', ''),
+        'visible_details': list(understanding.get('visible_details', [])),
+        'condition_notes': list(understanding.get('condition_notes', [])),
+        'photos': list(understanding.get('photos', [])),
+    }
+    for observation in observations:
+        if not merged['product_type'] and observation.get('product_type'):
+            merged['product_type'] = str(observation['product_type']).strip()
+        _add_unique(merged['visible_details'], observation.get('visible_details') or [])
+        notes = observation.get('condition_notes')
+        _add_unique(merged['condition_notes'], notes if isinstance(notes, list) else [notes or ''])
+    _add_unique(merged['photos'], photo_hashes)
+    return merged
+
+
+def describe(understanding: Dict) -> str:
+    """Short plain-text summary of the understanding for prompts"""
+    lines = []
+    if understanding.get('product_type'):
+        lines.append(f"Product: {understanding['product_type']}")
+    if understanding.get('visible_details'):
+        lines.append(f"Visible details: {'; '.join(understanding['visible_details'])}")
+    if understanding.get('condition_notes'):
+        lines.append(f"Condition notes: {'; '.join(understanding['condition_notes'])}")
+    return "\n".join(lines) or "Nothing yet"
+
+
+def parse_json(text: str) -> Dict:
+    """JSON object from a model reply, tolerating ```json fences"""
+    result = json.loads(text.strip().replace('```json', '').replace('```', ''))
+    if not isinstance(result, dict):
+        raise json.JSONDecodeError("Expected a JSON object", text, 0)
+    return result
+
+
+class ObservationStore:
+    """photo hash -> observation JSON, per model, in SQLite"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = db_path
+        db.execute_script(self.db_path, """
+            CREATE TABLE IF NOT EXISTS photo_observations (
+                photo_hash TEXT,
+                model TEXT,
+                observation TEXT,
+                created_at REAL,
+                PRIMARY KEY (photo_hash, model)
+            ) WITHOUT ROWID;
+        """)
+
+    def get_many(self, photo_hashes: List[str], model_name: str) -> Dict[str, Dict]:
+        """Cached observations for whichever of the hashes have one"""
+        if not photo_hashes:
+            return {}
+        placeholders = ", ".join("?" * len(photo_hashes))
+        rows = db.read(self.db_path, f"""
+            SELECT photo_hash, observation FROM photo_observations
+            WHERE model = ? AND photo_hash IN ({placeholders})
+        """, [model_name] + list(photo_hashes))
+        return {photo_hash: json.loads(observation) for photo_hash, observation in rows}
+
+    def put_many(self, observations: Dict[str, Dict], model_name: str):
+        now = time.time()
+        db.write_many(self.db_path, """
+            INSERT OR REPLACE INTO photo_observations (photo_hash, model, observation, created_at)
+            VALUES (?, ?, ?, ?)
+        """, [(photo_hash, model_name, json.dumps(observation), now) for photo_hash, observation in observations.items()])
+
+
+def observation_prompt(understanding: Dict, conversation_context: str, photo_count: int) -> str:
+    return f"""You are helping create an eBay listing. Analyze these {photo_count} new product photo(s), all of the same item.
+
+What earlier photos showed:
+{describe(understanding)}
+
+Previous conversation context:
+{conversation_context}
+
+Your job is to:
+1. Describe what EACH new photo shows, in order
+2. Ask SPECIFIC questions about details no photo shows clearly
+
+Return a JSON object like:
+{{
+    "photos": [
+        {{
+            "product_type": "what is this?",
+            "visible_details": ["detail 1", "detail 2"],
+            "condition_notes": "visible condition"
+        }}
+    ],
+    "questions": [
+        "What's the brand name? I can't see a label clearly",
+        "What size is this?",
+        "Any stains or defects I should mention?"
+    ],
+    "confidence": "high/medium/low"
+}}
+
+Return exactly one "photos" entry per new photo. Be conversational and friendly in your questions!"""
+
+
+def analyze_new_photos(model, photo_hashes: List[str], understanding: Dict, store: ObservationStore,
+                       load_images: Callable[[List[str]], List[dict]], model_name: str,
+                       conversation_context: str = "",
+                       on_progress: Optional[Callable[[str, Dict], None]] = None) -> Tuple[Dict, List[str], str, int]:
+    """Analyze only photos missing from the understanding and the cache
+
+    Returns (understanding, questions, confidence, model calls made). With
+    on_progress the reply is streamed and on_progress(text, completed_fields)
+    is called per chunk. Reply parsing errors propagate as ValueError.
+    """
+    new = [h for h in dict.fromkeys(photo_hashes) if h not in understanding.get('photos', [])]
+    known = store.get_many(new, model_name)
+    to_send = [h for h in new if h not in known]
+
+    questions: List[str] = []
+    confidence = 'medium'
+    calls = 0
+    # Later chunks are told what earlier ones (and cached photos) showed
+    so_far = merge_observations(understanding, [], [known[h] for h in new if h in known])
+    for start in range(0, len(to_send), MAX_PHOTOS_PER_CALL):
+        chunk = to_send[start:start + MAX_PHOTOS_PER_CALL]
+        prompt = observation_prompt(so_far, conversation_context, len(chunk))
+        contents = [prompt] + load_images(chunk)
+        if on_progress:
+            text = stream_text(model.generate_content(contents, stream=True), on_progress)
+        else:
+            text = model.generate_content(contents).text
+        calls += 1
+        result = parse_json(text)
+
+        per_photo = [entry for entry in result.get('photos', []) if isinstance(entry, dict)]
+        # Photos the reply skipped are neither cached nor marked analyzed, so the next turn resends them
+        observed = dict(zip(chunk, per_photo))
+        store.put_many(observed, model_name)
+        known.update(observed)
+        so_far = merge_observations(so_far, [], list(observed.values()))
+        questions = result.get('questions', questions)
+        confidence = result.get('confidence', confidence)
+
+    analyzed = [h for h in new if h in known]
+    understanding = merge_observations(understanding, analyzed, [known[h] for h in analyzed])
+    return understanding, questions or list(DEFAULT_QUESTIONS), confidence, calls
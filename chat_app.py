@@ -7,17 +7,21 @@ Perfect for iPhone and mobile use
 
 import streamlit as st
 import json
-import sqlite3
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
-from PIL import Image
-import io
-import os
-import google.generativeai as genai
-from typing import Dict, List, Optional
-import hashlib
+from typing import List, Optional, TextIO
 import time
+from image_pipeline import DEFAULT_MODEL_PRESET, prepare_model_inputs
+from photo_store import PhotoStore
+from lru_cache import LRUCache
+from gemini_client import GeminiClients
+from chat_analysis import ObservationStore, analyze_new_photos, empty_understanding, parse_json
+from json_stream import stream_text
+from chat_context import ANALYSIS_TOKEN_BUDGET, DEFAULT_TOKEN_BUDGET, compact_conversation
+from conversation_store import init_store as init_conversation_store, load_conversation, save_conversation
+import db
+from listing_export import LAYOUTS as EXPORT_LAYOUTS, csv_file, db_listings
+from sku_allocator import DEFAULT_PREFIX as DEFAULT_SKU_PREFIX, SkuAllocator
 
 # Page config - MOBILE OPTIMIZED
 st.set_page_config(
@@ -83,22 +87,39 @@ if 'current_product' not in st.session_state:
         'conversation_stage': 'awaiting_photos'
     }
 
+# Photos are kept on disk by content hash; current_product['photos'] holds hashes
+PHOTO_STORE = PhotoStore(Path("data") / "photos")
+
+@st.cache_resource
+def get_model_input_cache() -> LRUCache:
+    """Prepared model images keyed by (hash, preset), shared by analyze and generate"""
+    return LRUCache(max_entries=256, spill_dir=Path("data") / "cache" / "model_inputs")
+
+@st.cache_resource
+def get_observation_store() -> ObservationStore:
+    """Per-photo AI observations by hash, so photos are only analyzed once"""
+    return ObservationStore(LISTINGS_DB)
+
+@st.cache_resource
+def get_gemini_clients() -> GeminiClients:
+    """Warm Gemini models per API key, shared across reruns and sessions"""
+    return GeminiClients()
+
+@st.cache_resource
+def get_sku_allocator(prefix: str) -> SkuAllocator:
+    """SKUs from the shared sequence table; safe across sessions and processes"""
+    return SkuAllocator(LISTINGS_DB, prefix)
+
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
-if 'listings_db' not in st.session_state:
-    # Initialize database
-    DATA_DIR = Path("data")
-    DATA_DIR.mkdir(exist_ok=True)
-    st.session_state.listings_db = DATA_DIR / "chat_listings.db"
-    init_chat_database()
+DATA_DIR = Path("data")
+DATA_DIR.mkdir(exist_ok=True)
+LISTINGS_DB = DATA_DIR / "chat_listings.db"
 
 def init_chat_database():
     """Initialize SQLite database for chat listings"""
-    conn = sqlite3.connect(st.session_state.listings_db)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    db.execute_script(LISTINGS_DB, """
         CREATE TABLE IF NOT EXISTS listings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             sku TEXT UNIQUE,
@@ -112,20 +133,23 @@ def init_chat_database():
             condition TEXT,
             material TEXT,
             photos TEXT,
-            conversation_history TEXT,
+            conversation_id TEXT,
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+        );
 
-    cursor.execute("""
         CREATE TABLE IF NOT EXISTS config (
             key TEXT PRIMARY KEY,
             value TEXT
-        )
+        );
     """)
+    db.execute_script(LISTINGS_DB, db.counter_schema('listings'))
+    # Transcripts live in their own compressed table; older databases are migrated here
+    init_conversation_store(LISTINGS_DB)
 
-    conn.commit()
-    conn.close()
+if 'listings_db' not in st.session_state:
+    # Initialize database
+    init_chat_database()
+    st.session_state.listings_db = LISTINGS_DB
 
 def get_config(key: str, default: str = "") -> str:
     """Get configuration value"""
@@ -138,24 +162,54 @@ def get_config(key: str, default: str = "") -> str:
             pass
 
     # Fall back to database
-    conn = sqlite3.connect(st.session_state.listings_db)
-    cursor = conn.cursor()
-    cursor.execute("SELECT value FROM config WHERE key = ?", (key,))
-    result = cursor.fetchone()
-    conn.close()
+    result = db.read_one(LISTINGS_DB, "SELECT value FROM config WHERE key = ?", (key,))
     return result[0] if result else default
 
 def set_config(key: str, value: str):
     """Set configuration value"""
-    conn = sqlite3.connect(st.session_state.listings_db)
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
-    conn.commit()
-    conn.close()
-
-def analyze_photos_with_ai(photos: List[bytes], conversation_context: str = "") -> dict:
-    """Analyze photos and ask clarifying questions"""
+    db.write(LISTINGS_DB, "INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
+
+# Streamed replies: listing fields shown as soon as they are complete, redrawn at most every 0.1s
+STREAM_FIELD_LABELS = [
+    ('title', "📝 **Title:**"),
+    ('price', "💰 **Price:** $"),
+    ('category', "📦 **Category:**"),
+    ('brand', "🏷️ **Brand:**"),
+    ('size', "📏 **Size:**"),
+    ('condition', "✨ **Condition:**"),
+]
+STREAM_RENDER_INTERVAL = 0.1
+STREAM_TAIL_CHARS = 160
+
+def context_token_budget() -> int:
+    """Token budget for conversation context in each AI call"""
+    try:
+        return int(get_config('context_token_budget', str(DEFAULT_TOKEN_BUDGET)))
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+def record_context_stats(call: str, stats: dict):
+    """Keep the latest prompt-size numbers per call type for the sidebar"""
+    st.session_state.setdefault('context_stats', {})[call] = stats
+
+def load_photo_images(photo_hashes: List[str]) -> List[dict]:
+    """Downscaled model inputs for stored photos"""
+    return prepare_model_inputs(
+        photo_hashes,
+        PHOTO_STORE,
+        get_model_input_cache(),
+        get_config('model_image_preset', DEFAULT_MODEL_PRESET)
+    )
+
+def analyze_photos_with_ai(photos: List[str], conversation_context: str = "",
+                           understanding: Optional[dict] = None, on_progress=None) -> dict:
+    """Analyze newly added photos and ask clarifying questions
+
+    Photos already in `understanding` (or analyzed before, per the observation
+    cache) are not sent again; the returned 'understanding' merges everything.
+    """
     api_key = get_config('gemini_api_key')
+    understanding = understanding or empty_understanding()
 
     if not api_key:
         return {
@@ -168,53 +222,25 @@ def analyze_photos_with_ai(photos: List[bytes], conversation_context: str = "")
         }
 
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
-
-        # Prepare images
-        image_parts = []
-        for photo_bytes in photos[:5]:
-            image = Image.open(io.BytesIO(photo_bytes))
-            image_parts.append(image)
-
-        # First analysis - what can AI see?
-        prompt = f"""You are helping create an eBay listing. Analyze these product photos.
-
-Previous conversation context:
-{conversation_context}
-
-Your job is to:
-1. Identify what the product is
-2. Note what details you CAN see clearly
-3. Note what details you CANNOT see and need to ask about
-4. Ask SPECIFIC questions to fill in missing information
-
-Return a JSON object like:
-{{
-    "what_i_can_see": {{
-        "product_type": "what is this?",
-        "visible_details": ["detail 1", "detail 2"],
-        "condition_notes": "visible condition"
-    }},
-    "questions": [
-        "What's the brand name? I can't see a label clearly",
-        "What size is this?",
-        "Any stains or defects I should mention?"
-    ],
-    "confidence": "high/medium/low"
-}}
-
-Be conversational and friendly in your questions!"""
-
-        response = model.generate_content([prompt] + image_parts)
+        model = get_gemini_clients().model(api_key, 'gemini-1.5-flash')
 
         try:
-            result = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
+            understanding, questions, confidence, _ = analyze_new_photos(
+                model,
+                photos,
+                understanding,
+                get_observation_store(),
+                load_photo_images,
+                'gemini-1.5-flash',
+                conversation_context,
+                on_progress
+            )
             return {
                 'needs_clarification': True,
-                'ai_observations': result.get('what_i_can_see', {}),
-                'questions': result.get('questions', []),
-                'confidence': result.get('confidence', 'medium'),
+                'ai_observations': understanding,
+                'understanding': understanding,
+                'questions': questions,
+                'confidence': confidence,
                 'stage': 'gathering_info'
             }
         except json.JSONDecodeError:
@@ -239,8 +265,12 @@ Be conversational and friendly in your questions!"""
             'stage': 'error'
         }
 
-def generate_listing_from_conversation(photos: List[bytes], conversation: List[dict]) -> dict:
-    """Generate final listing based on photos and conversation"""
+def generate_listing_from_conversation(photos: List[str], conversation: List[dict],
+                                       understanding: Optional[dict] = None, on_progress=None) -> dict:
+    """Generate final listing based on photos and conversation
+
+    With on_progress the reply is streamed; see live_progress().
+    """
     api_key = get_config('gemini_api_key')
 
     if not api_key:
@@ -252,24 +282,23 @@ def generate_listing_from_conversation(photos: List[bytes], conversation: List[d
         }
 
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        model = get_gemini_clients().model(api_key, 'gemini-1.5-flash')
 
         # Prepare images
-        image_parts = []
-        for photo_bytes in photos[:5]:
-            image = Image.open(io.BytesIO(photo_bytes))
-            image_parts.append(image)
-
-        # Build conversation context
-        conv_text = "\n".join([
-            f"{msg['role']}: {msg['content']}"
-            for msg in conversation
-        ])
+        image_parts = load_photo_images(photos[:5])
+
+        # Facts (from every photo, including ones past the first five sent below) plus
+        # the recent conversation, within the token budget
+        conv_text, stats = compact_conversation(
+            conversation,
+            understanding,
+            st.session_state.current_product.get('listing_data'),
+            context_token_budget()
+        )
+        record_context_stats('listing', stats)
 
         prompt = f"""Create a professional eBay listing based on these photos and our conversation.
 
-Conversation history:
 {conv_text}
 
 Generate a complete listing in JSON format:
@@ -291,15 +320,18 @@ Generate a complete listing in JSON format:
 
 Make it professional and keyword-rich for eBay search!"""
 
-        response = model.generate_content([prompt] + image_parts)
+        if on_progress:
+            text = stream_text(model.generate_content([prompt] + image_parts, stream=True), on_progress)
+        else:
+            text = model.generate_content([prompt] + image_parts).text
 
         try:
-            result = json.loads(response.text.strip().replace('```json', '').replace('```', ''))
-            return result
+            # The streamed field values are only a preview; the whole reply must parse
+            return parse_json(text)
         except json.JSONDecodeError:
             return {
                 'title': 'Product Listing',
-                'description': response.text[:500],
+                'description': text[:500],
                 'price': 0.00,
                 'category': 'General',
                 'brand': 'Unknown',
@@ -316,39 +348,61 @@ Make it professional and keyword-rich for eBay search!"""
             'category': 'Error'
         }
 
+def streaming_enabled() -> bool:
+    return get_config('stream_responses', '1') == '1'
+
+def live_progress(placeholder):
+    """on_progress callback rendering streamed fields into placeholder as they complete"""
+    last_render = [0.0]
+
+    def render(text: str, fields: dict):
+        now = time.monotonic()
+        if now - last_render[0] < STREAM_RENDER_INTERVAL:
+            return
+        last_render[0] = now
+
+        lines = [f"{label} {fields[key]}" for key, label in STREAM_FIELD_LABELS if key in fields]
+        if 'questions' in fields:
+            lines += [f"• {q}" for q in fields['questions']]
+        with placeholder.container():
+            if lines:
+                st.markdown("\n\n".join(lines))
+            st.caption(f"✍️ …{text[-STREAM_TAIL_CHARS:]}")
+
+    return render
+
 def save_listing_to_db(listing_data: dict, conversation: List[dict]):
     """Save completed listing to database"""
-    conn = sqlite3.connect(st.session_state.listings_db)
-    cursor = conn.cursor()
-
-    # Generate SKU
-    sku = f"SKU{int(time.time())}"
-
-    cursor.execute("""
-        INSERT INTO listings
-        (sku, title, description, price, category, brand, size, color, condition, material, conversation_history)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        sku,
-        listing_data.get('title', ''),
-        listing_data.get('description', ''),
-        listing_data.get('price', 0.00),
-        listing_data.get('category', ''),
-        listing_data.get('brand', ''),
-        listing_data.get('size', ''),
-        listing_data.get('color', ''),
-        listing_data.get('condition', ''),
-        listing_data.get('material', ''),
-        json.dumps(conversation)
-    ))
-
-    conn.commit()
-    conn.close()
+    sku = get_sku_allocator(get_config('sku_prefix', DEFAULT_SKU_PREFIX) or DEFAULT_SKU_PREFIX).allocate()
+
+    with db.transaction(LISTINGS_DB) as conn:
+        # Transcript and listing are committed together
+        conversation_id = save_conversation(LISTINGS_DB, conversation)
+        conn.execute("""
+            INSERT INTO listings
+            (sku, title, description, price, category, brand, size, color, condition, material, conversation_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            sku,
+            listing_data.get('title', ''),
+            listing_data.get('description', ''),
+            listing_data.get('price', 0.00),
+            listing_data.get('category', ''),
+            listing_data.get('brand', ''),
+            listing_data.get('size', ''),
+            listing_data.get('color', ''),
+            listing_data.get('condition', ''),
+            listing_data.get('material', ''),
+            conversation_id
+        ))
 
     return sku
 
-def process_user_message(message: str, uploaded_files=None):
-    """Process user message and generate AI response"""
+def process_user_message(message: str, uploaded_files=None, on_progress=None):
+    """Process user message and generate AI response
+
+    on_progress, if given, receives streamed model output (see live_progress).
+    """
 
     # Check for API key setup
     if 'set api key' in message.lower() or 'api key' in message.lower():
@@ -366,19 +420,33 @@ def process_user_message(message: str, uploaded_files=None):
         # Process photos
         photos = []
         for file in uploaded_files:
-            photo_bytes = file.read()
-            photos.append(photo_bytes)
-            st.session_state.current_product['photos'].append(photo_bytes)
-
-        # AI analyzes photos and asks questions
+            # Hashed while streaming to disk; re-sent shots are recognised by hash
+            file.seek(0)
+            photo_hash = PHOTO_STORE.put_stream(file)
+            photos.append(photo_hash)
+            if photo_hash not in st.session_state.current_product['photos']:
+                st.session_state.current_product['photos'].append(photo_hash)
+
+        # AI analyzes the newly added photos and asks questions
+        context, stats = compact_conversation(
+            st.session_state.messages,
+            st.session_state.current_product.get('understanding'),
+            token_budget=min(ANALYSIS_TOKEN_BUDGET, context_token_budget())
+        )
+        record_context_stats('analysis', stats)
         analysis = analyze_photos_with_ai(
             st.session_state.current_product['photos'],
-            "\n".join([m['content'] for m in st.session_state.messages[-5:]])
+            context,
+            st.session_state.current_product.get('understanding'),
+            on_progress
         )
 
         if analysis.get('stage') == 'need_api_key':
             return "\n".join(analysis['questions'])
 
+        if analysis.get('understanding'):
+            st.session_state.current_product['understanding'] = analysis['understanding']
+
         # AI asks clarifying questions
         response = f"📸 Got {len(photos)} photo(s)!\n\n"
 
@@ -403,7 +471,9 @@ def process_user_message(message: str, uploaded_files=None):
             # Generate listing
             listing = generate_listing_from_conversation(
                 st.session_state.current_product['photos'],
-                st.session_state.messages + [{'role': 'user', 'content': message}]
+                st.session_state.messages + [{'role': 'user', 'content': message}],
+                st.session_state.current_product.get('understanding'),
+                on_progress
             )
 
             # Format response
@@ -468,11 +538,7 @@ Or type "view my listings" to see all saved items."""
 
     # View listings
     if 'view' in message.lower() and 'listing' in message.lower():
-        conn = sqlite3.connect(st.session_state.listings_db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT sku, title, price FROM listings ORDER BY created_at DESC LIMIT 10")
-        listings = cursor.fetchall()
-        conn.close()
+        listings = db.read(LISTINGS_DB, "SELECT sku, title, price FROM listings ORDER BY created_at DESC LIMIT 10")
 
         if not listings:
             return "You don't have any saved listings yet. Upload some photos to get started!"
@@ -494,6 +560,18 @@ Or type "view my listings" to see all saved items."""
 
 What would you like to do?"""
 
+def respond(message: str, uploaded_files, spinner_text: str) -> str:
+    """Run process_user_message inside the current chat bubble and show the reply"""
+    if streaming_enabled():
+        live = st.empty()
+        response = process_user_message(message, uploaded_files, live_progress(live))
+        live.empty()
+    else:
+        with st.spinner(spinner_text):
+            response = process_user_message(message, uploaded_files)
+    st.markdown(response)
+    return response
+
 def check_password():
     """Check password for private deployment"""
     # Only require password if deployed (has secrets configured)
@@ -564,31 +642,83 @@ def main():
             set_config('gemini_api_key', api_key)
             st.success("✅ API key saved")
 
+        stream = st.toggle(
+            "Stream AI replies",
+            value=streaming_enabled(),
+            help="Show listing fields as they are generated instead of waiting for the full reply"
+        )
+        if stream != streaming_enabled():
+            set_config('stream_responses', '1' if stream else '0')
+
+        sku_prefix = st.text_input(
+            "SKU prefix",
+            value=get_config('sku_prefix', DEFAULT_SKU_PREFIX),
+            help="New listings are numbered PREFIX000001, PREFIX000002, ..."
+        ).strip()
+        if sku_prefix and sku_prefix != get_config('sku_prefix', DEFAULT_SKU_PREFIX):
+            set_config('sku_prefix', sku_prefix)
+
+        token_budget = st.number_input(
+            "Context budget (tokens)",
+            min_value=200, max_value=32000, step=100,
+            value=context_token_budget(),
+            help="Most conversation context sent with each AI request"
+        )
+        if token_budget != context_token_budget():
+            set_config('context_token_budget', str(int(token_budget)))
+
+        for call, stats in st.session_state.get('context_stats', {}).items():
+            st.caption(
+                f"Last {call} prompt: {stats['tokens_before']} → {stats['tokens_after']} tokens "
+                f"({stats['messages_after']}/{stats['messages_before']} messages)"
+            )
+
         st.divider()
 
         # Quick stats
-        conn = sqlite3.connect(st.session_state.listings_db)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM listings")
-        count = cursor.fetchone()[0]
-        conn.close()
+        count = db.row_counts(LISTINGS_DB).get('listings', 0)
 
         st.metric("Total Listings", count)
 
         if count > 0:
-            if st.button("📥 Export All to CSV", use_container_width=True):
-                df = pd.read_sql_query(
-                    "SELECT sku, title, description, price, category, brand, size, color, condition FROM listings",
-                    sqlite3.connect(st.session_state.listings_db)
-                )
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    "⬇️ Download CSV",
-                    csv,
-                    f"ebay_listings_{datetime.now().strftime('%Y%m%d')}.csv",
-                    "text/csv",
-                    use_container_width=True
+            layout = st.selectbox(
+                "Export format",
+                list(EXPORT_LAYOUTS),
+                format_func=lambda key: EXPORT_LAYOUTS[key][0]
+            )
+
+            def export_all_listings() -> TextIO:
+                # Streams the table to a temporary file in chunks; runs only when the button is clicked
+                return csv_file(db_listings(LISTINGS_DB), layout)
+
+            st.download_button(
+                "📥 Export All to CSV",
+                export_all_listings,
+                f"ebay_listings_{layout}_{datetime.now().strftime('%Y%m%d')}.csv",
+                "text/csv",
+                use_container_width=True
+            )
+
+        if count > 0:
+            recent = db.read(LISTINGS_DB, """
+                SELECT sku, title, conversation_id FROM listings
+                WHERE conversation_id IS NOT NULL ORDER BY id DESC LIMIT 50
+            """)
+            if recent:
+                conversation_ids = {sku: conversation_id for sku, _, conversation_id in recent}
+                titles = {sku: title for sku, title, _ in recent}
+                history_sku = st.selectbox(
+                    "🕘 Listing conversation",
+                    list(conversation_ids),
+                    index=None,
+                    placeholder="Choose a listing",
+                    format_func=lambda sku: f"{sku} - {titles[sku] or 'Untitled'}"
                 )
+                # Transcripts are only read and decompressed once a listing is picked
+                if history_sku:
+                    with st.expander(f"Conversation for {history_sku}", expanded=True):
+                        for msg in load_conversation(LISTINGS_DB, conversation_ids[history_sku]):
+                            st.markdown(f"**{msg['role'].title()}:** {msg['content']}")
 
         if st.button("🗑️ Clear Chat", use_container_width=True):
             st.session_state.messages = [st.session_state.messages[0]]  # Keep welcome message
@@ -626,12 +756,9 @@ def main():
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Process and get AI response
+        # Process and get AI response (streamed replies fill in live instead of a spinner)
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = process_user_message(prompt, uploaded_files)
-
-            st.markdown(response)
+            response = respond(prompt, uploaded_files, "Thinking...")
 
         # Add AI response
         st.session_state.messages.append({
@@ -660,10 +787,7 @@ def main():
 
         # Process photos
         with st.chat_message("assistant"):
-            with st.spinner("Analyzing photos..."):
-                response = process_user_message("", uploaded_files)
-
-            st.markdown(response)
+            response = respond("", uploaded_files, "Analyzing photos...")
 
         st.session_state.messages.append({
             "role": "assistant",
@@ -0,0 +1,108 @@
+"""
+Chat context compaction - what the model is told about the conversation
+A structured summary of the facts gathered so far, then as much of the
+recent, non-boilerplate conversation as fits a token budget
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_TOKEN_BUDGET = 1500
+ANALYSIS_TOKEN_BUDGET = 400
+# Rough Gemini tokenizer ratio for English chat text
+CHARS_PER_TOKEN = 4
+MAX_MESSAGE_CHARS = 1200
+
+# Canned assistant replies and UI echoes that carry no product facts
+BOILERPLATE_PREFIXES = (
+    "👋 Hey! I'm your eBay listing assistant",
+    "I'm here to help create eBay listings!",
+    "To set your API key",
+    "✅ Great! I've saved your API key",
+    "📋 Your Recent Listings",
+    "You don't have any saved listings yet",
+    "No problem! Send me photos",
+    "Sure! What would you like to change?",
+    "✅ Awesome! Listing saved",
+    # The draft listing itself goes into the summary as structured fields
+    "Perfect! Here's your eBay listing:",
+    "*Uploaded ",
+)
+# Gemini and OpenAI-style key shapes; words like "desk-lamp" or "Husk-Tech" don't match
+API_KEY_PATTERN = re.compile(r'\bAIza[0-9A-Za-z_-]{30,}|\bsk-[A-Za-z0-9_-]{20,}')
+LISTING_SUMMARY_FIELDS = ['title', 'price', 'category', 'brand', 'size', 'color', 'condition', 'material']
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def contains_api_key(text: str) -> bool:
+    return API_KEY_PATTERN.search(text) is not None
+
+
+def is_boilerplate(message: Dict) -> bool:
+    content = str(message.get('content', '')).strip()
+    if not content:
+        return True
+    # Pasted API keys must never be sent back to the model
+    if message.get('role') == 'user' and contains_api_key(content):
+        return True
+    return content.startswith(BOILERPLATE_PREFIXES)
+
+
+def render_transcript(messages: List[Dict]) -> str:
+    return "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+
+
+def fact_summary(understanding: Optional[Dict] = None, listing: Optional[Dict] = None) -> str:
+    """Facts gathered so far, as short labelled lines"""
+    lines = []
+    understanding = understanding or {}
+    if understanding.get('product_type'):
+        lines.append(f"- Product: {understanding['product_type']}")
+    if understanding.get('visible_details'):
+        lines.append(f"- Seen in photos: {'; '.join(understanding['visible_details'])}")
+    if understanding.get('condition_notes'):
+        lines.append(f"- Condition seen: {'; '.join(understanding['condition_notes'])}")
+    for field in LISTING_SUMMARY_FIELDS:
+        if listing and listing.get(field) not in (None, ''):
+            lines.append(f"- Draft {field}: {listing[field]}")
+    return "\n".join(lines)
+
+
+def compact_conversation(messages: List[Dict], understanding: Optional[Dict] = None,
+                         listing: Optional[Dict] = None,
+                         token_budget: int = DEFAULT_TOKEN_BUDGET) -> Tuple[str, Dict[str, int]]:
+    """Context text within token_budget, plus before/after size metrics
+
+    Seller messages are kept before assistant ones (they hold the answers),
+    newest first; the kept messages are shown in their original order.
+    """
+    summary = fact_summary(understanding, listing)
+    header = f"Facts so far:\n{summary}\n\n" if summary else ""
+    budget = max(0, token_budget - estimate_tokens(header))
+
+    candidates = [
+        (index, {'role': msg['role'], 'content': str(msg['content'])[:MAX_MESSAGE_CHARS]})
+        for index, msg in enumerate(messages) if not is_boilerplate(msg)
+    ]
+    by_priority = sorted(candidates, key=lambda item: (item[1]['role'] != 'user', -item[0]))
+    kept = []
+    for index, msg in by_priority:
+        cost = estimate_tokens(f"{msg['role']}: {msg['content']}\n")
+        if cost > budget:
+            continue
+        budget -= cost
+        kept.append((index, msg))
+    kept.sort(key=lambda item: item[0])
+
+    transcript = render_transcript([msg for _, msg in kept])
+    text = header + (f"Recent conversation:\n{transcript}" if transcript else "")
+    stats = {
+        'messages_before': len(messages),
+        'messages_after': len(kept),
+        'tokens_before': estimate_tokens(render_transcript(messages)),
+        'tokens_after': estimate_tokens(text),
+    }
+    return text, stats
@@ -0,0 +1,163 @@
+"""
+Chat transcript storage - conversations live outside the listings table,
+zlib-compressed, without the welcome/help text or pasted API keys, and
+deduplicated by content
+
+Each saved conversation is a chain of segments keyed by a running hash of
+its messages, so saving several listings from one chat session stores the
+shared beginning of the transcript once.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import db
+from chat_context import contains_api_key
+
+COMPRESSION_LEVEL = 9
+# Canned replies not worth storing; every real exchange (draft listings, uploads, answers) is kept
+SKIPPED_PREFIXES = (
+    "👋 Hey! I'm your eBay listing assistant",
+    "I'm here to help create eBay listings!",
+    "To set your API key",
+)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS conversations (
+        hash TEXT PRIMARY KEY,
+        parent TEXT,
+        messages BLOB NOT NULL,
+        message_count INTEGER NOT NULL,
+        created_at REAL
+    );
+"""
+
+
+def _worth_storing(msg: Dict) -> bool:
+    content = str(msg.get('content', '')).strip()
+    if not content or content.startswith(SKIPPED_PREFIXES):
+        return False
+    # A pasted API key must not end up in the listings database
+    return not (msg.get('role') == 'user' and contains_api_key(content))
+
+
+def _message(msg: Dict) -> Dict:
+    stamp = msg.get('timestamp')
+    return {
+        'role': msg.get('role', ''),
+        'content': str(msg.get('content', '')),
+        'timestamp': stamp.isoformat() if isinstance(stamp, datetime) else stamp,
+    }
+
+
+def _chain(messages: List[Dict]) -> List[str]:
+    """Running hash after each message; entry i identifies messages[:i + 1]"""
+    hashes = []
+    digest = ""
+    for msg in messages:
+        encoded = json.dumps(msg, sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(f"{digest}\n{encoded}".encode()).hexdigest()
+        hashes.append(digest)
+    return hashes
+
+
+def init_store(db_path: Union[str, Path]) -> int:
+    """Create the conversations table and move any inline listings.conversation_history into it
+
+    Histories are copied verbatim; the inline copy is only cleared once the stored
+    one reads back identical, so an interrupted or failed migration loses nothing.
+    Returns the number of listings migrated.
+    """
+    db.execute_script(db_path, SCHEMA)
+    columns = {row[1] for row in db.read(db_path, "PRAGMA table_info(listings)")}
+    if 'conversation_id' not in columns:
+        db.write(db_path, "ALTER TABLE listings ADD COLUMN conversation_id TEXT")
+    if 'conversation_history' not in columns:
+        return 0
+
+    with db.transaction(db_path) as conn:
+        rows = conn.execute("""
+            SELECT id, conversation_history FROM listings
+            WHERE conversation_history IS NOT NULL AND conversation_id IS NULL
+        """).fetchall()
+        for listing_id, history in rows:
+            messages = _legacy_messages(history)
+            if messages:
+                conn.execute("UPDATE listings SET conversation_id = ? WHERE id = ?",
+                             (_store(db_path, [_message(msg) for msg in messages]), listing_id))
+
+    # Copies committed above (or by an earlier, interrupted run) are checked before the original goes
+    verified = [
+        (listing_id,)
+        for listing_id, conversation_id, history in db.read(db_path, """
+            SELECT id, conversation_id, conversation_history FROM listings
+            WHERE conversation_history IS NOT NULL AND conversation_id IS NOT NULL
+        """)
+        if load_conversation(db_path, conversation_id) == [_message(msg) for msg in _legacy_messages(history)]
+    ]
+    migrated = db.write_many(db_path, "UPDATE listings SET conversation_history = NULL WHERE id = ?", verified)
+    if migrated:
+        # Hand the freed pages back to the filesystem (one-off, outside any transaction)
+        with db.connect(db_path) as conn:
+            conn.execute("VACUUM")
+    return migrated
+
+
+def _legacy_messages(history: str) -> List[Dict]:
+    """An inline conversation_history as a message list ([] if it isn't one)"""
+    try:
+        messages = json.loads(history)
+    except ValueError:
+        return []
+    if not isinstance(messages, list) or not all(isinstance(msg, dict) for msg in messages):
+        return []
+    return messages
+
+
+def save_conversation(db_path: Union[str, Path], messages: List[Dict]) -> Optional[str]:
+    """Store a transcript; returns its id, or None if nothing worth keeping is left"""
+    return _store(db_path, [_message(msg) for msg in messages if _worth_storing(msg)])
+
+
+def _store(db_path: Union[str, Path], kept: List[Dict]) -> Optional[str]:
+    if not kept:
+        return None
+    hashes = _chain(kept)
+
+    with db.transaction(db_path) as conn:
+        # Longest already-stored prefix of this transcript becomes the parent
+        stored = set()
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            placeholders = ", ".join("?" * len(batch))
+            stored.update(row[0] for row in conn.execute(
+                f"SELECT hash FROM conversations WHERE hash IN ({placeholders})", batch))
+        if hashes[-1] in stored:
+            return hashes[-1]
+        shared = max((i + 1 for i, digest in enumerate(hashes) if digest in stored), default=0)
+
+        segment = json.dumps(kept[shared:], ensure_ascii=False).encode()
+        conn.execute("""
+            INSERT OR IGNORE INTO conversations (hash, parent, messages, message_count, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (hashes[-1], hashes[shared - 1] if shared else None,
+              sqlite3.Binary(zlib.compress(segment, COMPRESSION_LEVEL)), len(kept), time.time()))
+    return hashes[-1]
+
+
+def load_conversation(db_path: Union[str, Path], conversation_id: Optional[str]) -> List[Dict]:
+    """Messages of a stored transcript, oldest first"""
+    segments = []
+    while conversation_id:
+        row = db.read_one(db_path, "SELECT parent, messages FROM conversations WHERE hash = ?", (conversation_id,))
+        if row is None:
+            break
+        conversation_id, blob = row
+        segments.append(json.loads(zlib.decompress(blob)))
+    return [msg for segment in reversed(segments) for msg in segment]
@@ -0,0 +1,195 @@
+"""
+Shared SQLite access layer for app.py and chat_app.py
+Pooled connections in WAL mode with tuned pragmas, a warm prepared-statement
+cache per connection, and busy-timeout plus retry for concurrent writers
+"""
+
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+BUSY_TIMEOUT_MS = 5000
+WRITE_RETRIES = 5
+STATEMENT_CACHE_SIZE = 256
+MAX_IDLE_CONNECTIONS = 8
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # WAL + NORMAL is durable across application crashes; only an OS crash
+    # can lose the last transactions
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA foreign_keys=ON",
+    # Rows removed by INSERT OR REPLACE fire DELETE triggers too (keeps row_counts exact)
+    "PRAGMA recursive_triggers=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+)
+
+PathLike = Union[str, Path]
+
+_pools: Dict[str, List[sqlite3.Connection]] = {}
+_pools_lock = threading.Lock()
+# Connection currently checked out by this thread, per database, so nested
+# helpers reuse it (and see the same transaction)
+_local = threading.local()
+
+
+def _open(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,  # autocommit; transactions are explicit (see transaction())
+        check_same_thread=False,  # pooled connections move between threads, never shared at once
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def connect(db_path: PathLike) -> Iterator[sqlite3.Connection]:
+    """Check out a pooled connection for the current thread"""
+    key = str(db_path)
+    held = getattr(_local, 'held', None)
+    if held is None:
+        held = _local.held = {}
+    if key in held:
+        yield held[key]
+        return
+
+    with _pools_lock:
+        pool = _pools.setdefault(key, [])
+        conn = pool.pop() if pool else None
+    if conn is None:
+        conn = _open(key)
+
+    held[key] = conn
+    try:
+        yield conn
+    finally:
+        del held[key]
+        if conn.in_transaction:
+            conn.rollback()
+        with _pools_lock:
+            pool = _pools.setdefault(key, [])
+            if len(pool) < MAX_IDLE_CONNECTIONS:
+                pool.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def _retry_busy(fn: Callable[[], Any], retries: int = WRITE_RETRIES) -> Any:
+    """Run fn, retrying with jittered backoff while another writer holds the lock"""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except sqlite3.OperationalError as error:
+            if not _is_busy(error) or attempt == retries:
+                raise
+            time.sleep(random.uniform(0, 0.05 * (2 ** attempt)))
+
+
+@contextmanager
+def transaction(db_path: PathLike) -> Iterator[sqlite3.Connection]:
+    """Write transaction; takes the write lock up front so it can't deadlock mid-way"""
+    with connect(db_path) as conn:
+        if conn.in_transaction:
+            # Nested use joins the outer transaction
+            yield conn
+            return
+        _retry_busy(lambda: conn.execute("BEGIN IMMEDIATE"))
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+
+def read(db_path: PathLike, sql: str, params: Sequence = ()) -> List[tuple]:
+    """Run a query and return all rows"""
+    with connect(db_path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def read_one(db_path: PathLike, sql: str, params: Sequence = ()) -> Optional[tuple]:
+    """Run a query and return the first row, or None"""
+    with connect(db_path) as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def write(db_path: PathLike, sql: str, params: Sequence = ()) -> sqlite3.Cursor:
+    """Run one statement in its own transaction"""
+    with transaction(db_path) as conn:
+        return conn.execute(sql, params)
+
+
+def write_many(db_path: PathLike, sql: str, rows: Iterable[Sequence]) -> int:
+    """Run one statement for many rows in a single transaction; returns rows affected"""
+    with transaction(db_path) as conn:
+        return conn.executemany(sql, rows).rowcount
+
+
+def execute_script(db_path: PathLike, script: str):
+    """Run schema DDL"""
+    with connect(db_path) as conn:
+        def run():
+            try:
+                conn.executescript(script)
+            except sqlite3.Error:
+                # A script with its own BEGIN can fail half-way; don't leave it open
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+        _retry_busy(run)
+
+
+def counter_schema(table: str) -> str:
+    """DDL keeping row_counts[table] equal to COUNT(*) via triggers, seeded from existing rows"""
+    return f"""
+        BEGIN IMMEDIATE;
+        CREATE TABLE IF NOT EXISTS row_counts (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        -- The scalar subquery only runs when the counter is new, so re-running this stays O(1)
+        INSERT INTO row_counts (name, value)
+        SELECT '{table}', (SELECT COUNT(*) FROM {table})
+        WHERE NOT EXISTS (SELECT 1 FROM row_counts WHERE name = '{table}');
+        CREATE TRIGGER IF NOT EXISTS {table}_count_insert AFTER INSERT ON {table}
+        BEGIN
+            UPDATE row_counts SET value = value + 1 WHERE name = '{table}';
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_count_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE row_counts SET value = value - 1 WHERE name = '{table}';
+        END;
+        COMMIT;
+    """
+
+
+def row_counts(db_path: PathLike) -> Dict[str, int]:
+    """Maintained row counts for every table set up with counter_schema"""
+    return dict(read(db_path, "SELECT name, value FROM row_counts"))
+
+
+def close_all():
+    """Close idle pooled connections (e.g. before deleting a database file)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            for conn in pool:
+                conn.close()
+        _pools.clear()
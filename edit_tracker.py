@@ -0,0 +1,98 @@
+"""
+Edit tracker - corrections made in the review table, recorded once per (SKU, field)
+Reruns that show the same edits produce no new feedback rows, and saves only
+write rows that changed since the last save. Diffs are columnwise masks.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Review-table columns whose corrections teach the AI
+FEEDBACK_FIELDS = ['Title', 'Price', 'Category', 'Brand', 'Material', 'Size', 'Color', 'Condition']
+
+# (sku, field_name, original_value, corrected_value, product_type)
+Correction = Tuple[str, str, str, str, str]
+# (sku, field_name, corrected_value this tracker recorded)
+Reverted = Tuple[str, str, str]
+
+
+def changed_cells(before: pd.DataFrame, after: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """(rows x columns) mask of cells that differ between two row-aligned frames; NaN equals NaN"""
+    if not len(after):
+        return np.zeros((0, len(columns)), dtype=bool)
+    masks = []
+    for column in columns:
+        old = before[column].reset_index(drop=True)
+        new = after[column].reset_index(drop=True)
+        masks.append((old.ne(new) & ~(old.isna() & new.isna())).to_numpy(dtype=bool))
+    return np.column_stack(masks)
+
+
+class EditTracker:
+    """Remembers the latest correction recorded for each (SKU, field) in this batch"""
+
+    def __init__(self, fields: Sequence[str] = FEEDBACK_FIELDS):
+        self.fields = list(fields)
+        self._recorded: Dict[Tuple[str, str], str] = {}
+        # Review table as of the last save to the listings table
+        self._saved: Optional[pd.DataFrame] = None
+
+    def reset(self):
+        """Start a new batch"""
+        self._recorded.clear()
+        self._saved = None
+
+    def __len__(self) -> int:
+        return len(self._recorded)
+
+    def pending(self, original: pd.DataFrame, edited: pd.DataFrame,
+                product_types: Optional[Dict[str, str]] = None) -> Tuple[List[Correction], List[Reverted]]:
+        """Corrections not yet recorded, and recorded ones since edited back to the AI's value
+
+        Both frames have one row per SKU in the same order (the editor uses num_rows="fixed").
+        product_types maps SKU -> the AI's product_type, the key prompts look feedback up by.
+        """
+        corrections = []
+        if edited.empty:
+            return corrections, []
+
+        # Only the changed cells are visited in Python
+        rows, columns = np.nonzero(changed_cells(original, edited, self.fields))
+        skus = edited['SKU'].to_numpy()[rows]
+        product_types = product_types or {}
+        changed = set()
+
+        for row, column, sku in zip(rows.tolist(), columns.tolist(), skus.tolist()):
+            field = self.fields[column]
+            key = (sku, field)
+            changed.add(key)
+            corrected = str(edited[field].iat[row])
+            if self._recorded.get(key) != corrected:
+                corrections.append((sku, field, str(original[field].iat[row]), corrected,
+                                    product_types.get(sku, '')))
+
+        reverted = [(sku, field, value) for (sku, field), value in self._recorded.items()
+                    if (sku, field) not in changed]
+        return corrections, reverted
+
+    def mark_recorded(self, corrections: List[Correction], reverted: List[Reverted]):
+        """Note what has been written so later reruns skip it"""
+        for sku, field, _, corrected, _ in corrections:
+            self._recorded[(sku, field)] = corrected
+        for sku, field, _ in reverted:
+            self._recorded.pop((sku, field), None)
+
+    def unsaved(self, edited: pd.DataFrame) -> pd.DataFrame:
+        """Rows of the review table that are new or changed since the last save"""
+        saved = self._saved
+        if saved is None or len(saved) != len(edited) or not saved['SKU'].reset_index(drop=True).equals(
+                edited['SKU'].reset_index(drop=True)):
+            return edited
+        columns = [column for column in edited.columns if column in saved.columns]
+        return edited[changed_cells(saved, edited, columns).any(axis=1)]
+
+    def mark_saved(self, edited: pd.DataFrame):
+        """Remember the table as written"""
+        self._saved = edited.copy()
@@ -0,0 +1,148 @@
+"""
+Feedback index - corrections aggregated into frequency-weighted patterns
+Triggers on the feedback table keep feedback_patterns current; prompt
+building reads the top patterns for a product type through an index
+"""
+
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import db
+
+DEFAULT_LIMIT = 10
+# At most this many examples per field, so one noisy field can't crowd out the rest
+DEFAULT_PER_FIELD = 3
+# Candidates read per query before the per-field cap is applied
+CANDIDATE_FACTOR = 4
+
+# (field_name, original_value, corrected_value, product_type, weight)
+Pattern = Tuple[str, str, str, str, int]
+
+_PATTERN_KEY = """
+    product_type = COALESCE({row}.product_type, '') AND field_name = COALESCE({row}.field_name, '')
+    AND original_value = COALESCE({row}.original_value, '') AND corrected_value = COALESCE({row}.corrected_value, '')
+"""
+
+_ADD_PATTERN = """
+    INSERT INTO feedback_patterns (product_type, field_name, original_value, corrected_value, weight, last_seen)
+    VALUES (COALESCE(NEW.product_type, ''), COALESCE(NEW.field_name, ''), COALESCE(NEW.original_value, ''),
+            COALESCE(NEW.corrected_value, ''), 1, NEW.timestamp)
+    ON CONFLICT(product_type, field_name, original_value, corrected_value) DO UPDATE SET
+        weight = weight + 1,
+        last_seen = MAX(last_seen, excluded.last_seen);
+"""
+
+_REMOVE_PATTERN = f"""
+    UPDATE feedback_patterns SET weight = weight - 1 WHERE {_PATTERN_KEY.format(row='OLD')};
+    DELETE FROM feedback_patterns WHERE weight <= 0 AND {_PATTERN_KEY.format(row='OLD')};
+"""
+
+SCHEMA = f"""
+    BEGIN IMMEDIATE;
+    CREATE TABLE feedback_patterns (
+        product_type TEXT COLLATE NOCASE NOT NULL,
+        field_name TEXT NOT NULL,
+        original_value TEXT NOT NULL,
+        corrected_value TEXT NOT NULL,
+        weight INTEGER NOT NULL,
+        last_seen DATETIME,
+        UNIQUE (product_type, field_name, original_value, corrected_value)
+    );
+    CREATE INDEX idx_feedback_patterns_type_rank ON feedback_patterns(product_type, weight DESC, last_seen DESC);
+    CREATE INDEX idx_feedback_patterns_rank ON feedback_patterns(weight DESC, last_seen DESC);
+
+    -- Seed from corrections recorded before the index existed
+    INSERT INTO feedback_patterns (product_type, field_name, original_value, corrected_value, weight, last_seen)
+    SELECT COALESCE(product_type, ''), COALESCE(field_name, ''), COALESCE(original_value, ''),
+           COALESCE(corrected_value, ''), COUNT(*), MAX(timestamp)
+    FROM feedback
+    GROUP BY COALESCE(product_type, '') COLLATE NOCASE, 2, 3, 4;
+
+    CREATE TRIGGER feedback_patterns_insert AFTER INSERT ON feedback
+    BEGIN
+        {_ADD_PATTERN}
+    END;
+    CREATE TRIGGER feedback_patterns_delete AFTER DELETE ON feedback
+    BEGIN
+        {_REMOVE_PATTERN}
+    END;
+    CREATE TRIGGER feedback_patterns_update
+    AFTER UPDATE OF product_type, field_name, original_value, corrected_value ON feedback
+    BEGIN
+        {_REMOVE_PATTERN}
+        {_ADD_PATTERN}
+    END;
+    COMMIT;
+"""
+
+
+# Bumped by every feedback change so compiled prompts know when to rebuild
+VERSION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS feedback_version (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO feedback_version (id, version) VALUES (0, 0);
+    CREATE TRIGGER IF NOT EXISTS feedback_version_insert AFTER INSERT ON feedback
+    BEGIN
+        UPDATE feedback_version SET version = version + 1 WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS feedback_version_update AFTER UPDATE ON feedback
+    BEGIN
+        UPDATE feedback_version SET version = version + 1 WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS feedback_version_delete AFTER DELETE ON feedback
+    BEGIN
+        UPDATE feedback_version SET version = version + 1 WHERE id = 0;
+    END;
+"""
+
+
+def init_index(db_path: Union[str, Path]):
+    """Create and seed feedback_patterns once; needs the feedback table to exist"""
+    exists = db.read_one(db_path, "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedback_patterns'")
+    if not exists:
+        db.execute_script(db_path, SCHEMA)
+    db.execute_script(db_path, VERSION_SCHEMA)
+
+
+def feedback_version(db_path: Union[str, Path]) -> int:
+    """Counter that changes whenever feedback rows are added, edited or removed"""
+    row = db.read_one(db_path, "SELECT version FROM feedback_version WHERE id = 0")
+    return row[0] if row else 0
+
+
+def relevant_feedback(db_path: Union[str, Path], product_type: Optional[str] = None,
+                      limit: int = DEFAULT_LIMIT, per_field: int = DEFAULT_PER_FIELD) -> List[Pattern]:
+    """Most frequent corrections, those for product_type first, at most per_field per field
+
+    Ties on frequency go to the most recently seen correction.
+    """
+    columns = "field_name, original_value, corrected_value, product_type, weight"
+    candidates = []
+    if product_type:
+        candidates += db.read(db_path, f"""
+            SELECT {columns} FROM feedback_patterns
+            WHERE product_type = ?
+            ORDER BY weight DESC, last_seen DESC
+            LIMIT ?
+        """, (product_type.strip(), limit * CANDIDATE_FACTOR))
+    candidates += db.read(db_path, f"""
+        SELECT {columns} FROM feedback_patterns
+        ORDER BY weight DESC, last_seen DESC
+        LIMIT ?
+    """, (limit * CANDIDATE_FACTOR,))
+
+    picked = []
+    seen = set()
+    per_field_count = {}
+    for pattern in candidates:
+        key = pattern[:4]
+        if key in seen or per_field_count.get(pattern[0], 0) >= per_field:
+            continue
+        seen.add(key)
+        per_field_count[pattern[0]] = per_field_count.get(pattern[0], 0) + 1
+        picked.append(pattern)
+        if len(picked) == limit:
+            break
+    return picked
@@ -0,0 +1,66 @@
+"""
+Gemini client registry - warm GenerativeModel objects shared across sessions
+One API client (and its connection) per API key, one model object per
+(key, model, generation config); nothing touches genai's process-global
+configuration, so users with different keys can't clobber each other
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+
+def _key_id(api_key: str) -> str:
+    # Registry keys are hashed so raw API keys don't sit in dict reprs or logs
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class GeminiClients:
+    """Thread-safe registry of ready-to-use models, keyed by (API key, model name, generation config)"""
+
+    def __init__(self, genai_module=None):
+        self.genai = genai_module or genai
+        self._lock = threading.Lock()
+        self._transports: Dict[str, Any] = {}
+        self._models: Dict[Tuple[str, str, str], Any] = {}
+        # Stand-ins (e.g. the benchmark fake) have no per-key clients and fall back to configure()
+        self._per_key_clients = self.genai is genai and hasattr(genai_client, '_ClientManager')
+        self.created = 0
+
+    def _transport(self, api_key: str):
+        """Generative service client bound to one API key; reused for every model on that key"""
+        key_id = _key_id(api_key)
+        transport = self._transports.get(key_id)
+        if transport is None:
+            manager = genai_client._ClientManager()
+            manager.configure(api_key=api_key)
+            transport = manager.get_default_client('generative')
+            self._transports[key_id] = transport
+        return transport
+
+    def model(self, api_key: str, model_name: str, generation_config: Optional[dict] = None):
+        """Warm model for this key; safe to call generate_content on from several threads"""
+        key = (_key_id(api_key), model_name, json.dumps(generation_config or {}, sort_keys=True))
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                if self._per_key_clients:
+                    model = self.genai.GenerativeModel(model_name, generation_config=generation_config)
+                    model._client = self._transport(api_key)
+                else:
+                    self.genai.configure(api_key=api_key)
+                    model = self.genai.GenerativeModel(model_name, generation_config=generation_config)
+                self._models[key] = model
+                self.created += 1
+        return model
+
+    def __len__(self) -> int:
+        return len(self._models)
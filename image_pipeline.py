@@ -0,0 +1,189 @@
+"""
+Photo ingestion pipeline - decode, thumbnail and hash uploads in parallel
+Kept free of Streamlit so it can run in worker threads and benchmarks
+"""
+
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from lru_cache import LRUCache
+from photo_grouping import dhash
+from photo_store import THUMBNAIL, PhotoStore
+
+THUMBNAIL_SIZE = (300, 300)
+THUMBNAIL_QUALITY = 85
+
+
+def default_workers() -> int:
+    """Number of ingestion workers to use when none is configured"""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def decode_image(source, size: Tuple[int, int] = THUMBNAIL_SIZE) -> Dict:
+    """Decode an image (bytes or file-like) at reduced resolution; returns its dimensions,
+    perceptual hash and a JPEG thumbnail"""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    image = Image.open(source)
+    width, height = image.size
+
+    # JPEG draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale, so a
+    # 12MP photo never fully materializes just to produce a 300px thumbnail
+    if image.format == 'JPEG':
+        image.draft('RGB', size)
+
+    image.thumbnail(size)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    thumb_io = io.BytesIO()
+    image.save(thumb_io, format='JPEG', quality=THUMBNAIL_QUALITY)
+    return {
+        'width': width,
+        'height': height,
+        'dhash': dhash(image),
+        'thumbnail_bytes': thumb_io.getvalue()
+    }
+
+
+def upload_key(upload: BinaryIO) -> Optional[Tuple]:
+    """Stable identity of an upload across reruns, if the uploader provides one"""
+    file_id = getattr(upload, 'file_id', None)
+    return ('upload', file_id) if file_id else None
+
+
+def hash_upload(upload: BinaryIO, store: PhotoStore, cache: Optional[LRUCache] = None) -> str:
+    """Stream an upload into the store and return its content hash"""
+    # A rerun with the same uploader contents resolves to the content hash
+    # without re-reading the file
+    key = upload_key(upload) if cache is not None else None
+    digest = cache.get(key) if key else None
+    if digest and store.has(digest):
+        return digest
+
+    upload.seek(0)
+    digest = store.put_stream(upload)
+    if key:
+        cache.put(key, digest)
+    return digest
+
+
+def decode_stored_photo(digest: str, store: PhotoStore, cache: Optional[LRUCache] = None) -> Dict:
+    """Decode a stored original once, writing its thumbnail to the store"""
+    decoded = cache.get(digest) if cache is not None else None
+    if decoded is None or 'dhash' not in decoded:
+        with store.mapped(digest) as mm:
+            decoded = decode_image(mm)
+        if cache is not None:
+            cache.put(digest, decoded)
+
+    if not store.has(digest, THUMBNAIL):
+        store.put(digest, decoded['thumbnail_bytes'], THUMBNAIL)
+    return decoded
+
+
+def ingest_photos(uploads: List[BinaryIO], store: PhotoStore, cache: Optional[LRUCache] = None,
+                  max_workers: Optional[int] = None) -> List[Dict]:
+    """Hash, dedupe, decode and thumbnail named file uploads, keeping first-seen order
+
+    Exact duplicates (same content hash) are dropped before any decode happens.
+    """
+    if not uploads:
+        return []
+
+    workers = max_workers or default_workers()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") if workers > 1 else None
+    map_fn = pool.map if pool else map
+
+    try:
+        # Pass 1: stream every upload into the store, hashing on the way.
+        # Each worker holds one read chunk at a time, so memory does not
+        # grow with batch size.
+        digests = list(map_fn(lambda upload: hash_upload(upload, store, cache), uploads))
+
+        photos = []
+        seen = set()
+        for upload, digest in zip(uploads, digests):
+            if digest in seen:
+                continue
+            seen.add(digest)
+            # Only the reference stays in session state; the bytes live in the store
+            photos.append({
+                'name': upload.name,
+                'hash': digest,
+                'assigned': False
+            })
+
+        # Pass 2: decode unique photos only. Pillow releases the GIL while
+        # decoding and resampling, so threads spread the work across cores.
+        decoded = map_fn(lambda photo: decode_stored_photo(photo['hash'], store, cache), photos)
+        for photo, info in zip(photos, decoded):
+            photo['dhash'] = info['dhash']
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return photos
+
+# Model input presets: images are downscaled to whichever budget is tighter
+# and re-encoded before being sent to Gemini
+MODEL_INPUT_PRESETS = {
+    'fast': {'max_edge': 1024, 'max_megapixels': 0.8, 'quality': 80},
+    'balanced': {'max_edge': 1536, 'max_megapixels': 1.6, 'quality': 85},
+    'detailed': {'max_edge': 2048, 'max_megapixels': 3.2, 'quality': 90},
+}
+DEFAULT_MODEL_PRESET = 'balanced'
+
+
+def model_input_size(width: int, height: int, preset: Dict) -> Tuple[int, int]:
+    """Target dimensions that satisfy both the max edge and megapixel budget"""
+    scale = min(
+        1.0,
+        preset['max_edge'] / max(width, height),
+        (preset['max_megapixels'] * 1_000_000 / (width * height)) ** 0.5
+    )
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def prepare_model_image(source, preset: Dict) -> bytes:
+    """Downscale, orient and re-encode one image for the model"""
+    image = Image.open(source)
+    target = model_input_size(image.width, image.height, preset)
+
+    if image.format == 'JPEG':
+        image.draft('RGB', target)
+    if image.size != target:
+        image = image.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    out = io.BytesIO()
+    image.save(out, format='JPEG', quality=preset['quality'], optimize=True)
+    return out.getvalue()
+
+
+def prepare_model_inputs(photo_hashes: List[str], store: PhotoStore, cache: Optional[LRUCache] = None,
+                         preset_name: str = DEFAULT_MODEL_PRESET) -> List[Dict]:
+    """Gemini-ready image parts for stored photos, cached by (hash, preset)"""
+    preset = MODEL_INPUT_PRESETS.get(preset_name, MODEL_INPUT_PRESETS[DEFAULT_MODEL_PRESET])
+    # Preset values are part of the key so tuning a preset never serves stale payloads
+    preset_key = (preset_name,) + tuple(sorted(preset.items()))
+
+    parts = []
+    for photo_hash in photo_hashes:
+        key = ('model_input', photo_hash, preset_key)
+        data = cache.get(key) if cache is not None else None
+        if data is None:
+            with store.mapped(photo_hash) as mm:
+                data = prepare_model_image(mm, preset)
+            if cache is not None:
+                cache.put(key, data)
+        parts.append({'mime_type': 'image/jpeg', 'data': data})
+    return parts
@@ -0,0 +1,184 @@
+"""
+Durable AI job queue - one row per SKU group in SQLite, claimed by worker
+processes (ai_worker.py), with results stored next to the listings
+
+Batches outlive the Streamlit script run, the browser tab and the worker
+processes themselves: jobs held by a worker that stops heartbeating go back
+to the queue, up to MAX_ATTEMPTS claims per job.
+"""
+
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import db
+from listing_pipeline import error_listing
+
+MAX_ATTEMPTS = 3
+# A worker that hasn't heartbeaten for this long is presumed dead
+WORKER_STALE_SECONDS = 30.0
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+# The API key is never written to the queue; workers resolve it themselves
+SECRET_CONFIG_KEYS = ('gemini_api_key',)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ai_batches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        config TEXT,
+        created_at REAL,
+        owner TEXT,
+        -- Set when its owner starts a new batch; closed batches are never resumed
+        closed_at REAL
+    );
+
+    CREATE TABLE IF NOT EXISTS ai_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        batch_id INTEGER NOT NULL REFERENCES ai_batches(id),
+        sku TEXT NOT NULL,
+        photos TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker TEXT,
+        result TEXT,
+        error TEXT,
+        updated_at REAL,
+        UNIQUE (batch_id, sku)
+    );
+    CREATE INDEX IF NOT EXISTS idx_ai_jobs_status ON ai_jobs(status, id);
+
+    CREATE TABLE IF NOT EXISTS ai_workers (
+        id TEXT PRIMARY KEY,
+        heartbeat REAL
+    ) WITHOUT ROWID;
+"""
+
+
+def worker_name(pid: Optional[int] = None) -> str:
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+class JobQueue:
+    """Per-SKU AI jobs grouped into batches"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = db_path
+        db.execute_script(db_path, SCHEMA)
+        # Queues created before batches had owners
+        columns = {row[1] for row in db.read(db_path, "PRAGMA table_info(ai_batches)")}
+        for column, column_type in (('owner', 'TEXT'), ('closed_at', 'REAL')):
+            if column not in columns:
+                db.write(db_path, f"ALTER TABLE ai_batches ADD COLUMN {column} {column_type}")
+        db.execute_script(db_path, "CREATE INDEX IF NOT EXISTS idx_ai_batches_owner ON ai_batches(owner, id)")
+
+    def submit(self, photo_groups: Dict[str, List[str]], config: dict, owner: Optional[str] = None) -> int:
+        """Queue one job per SKU group; returns the batch id
+
+        owner identifies who submitted it (the app's per-tab token), for latest_batch.
+        """
+        stored = {key: value for key, value in config.items() if key not in SECRET_CONFIG_KEYS}
+        now = time.time()
+        with db.transaction(self.db_path) as conn:
+            batch_id = conn.execute("INSERT INTO ai_batches (config, created_at, owner) VALUES (?, ?, ?)",
+                                    (json.dumps(stored), now, owner)).lastrowid
+            conn.executemany("""
+                INSERT INTO ai_jobs (batch_id, sku, photos, updated_at) VALUES (?, ?, ?, ?)
+            """, [(batch_id, sku, json.dumps(list(hashes)), now) for sku, hashes in photo_groups.items()])
+        return batch_id
+
+    def latest_batch(self, owner: str) -> Optional[int]:
+        """The owner's most recent batch that hasn't been closed, if any; other users' batches are never returned"""
+        row = db.read_one(self.db_path, "SELECT MAX(id) FROM ai_batches WHERE owner = ? AND closed_at IS NULL",
+                          (owner,))
+        return row[0] if row else None
+
+    def close(self, batch_id: int):
+        """Done with a batch: latest_batch no longer offers it (its jobs still finish)"""
+        db.write(self.db_path, "UPDATE ai_batches SET closed_at = ? WHERE id = ? AND closed_at IS NULL",
+                 (time.time(), batch_id))
+
+    def batch_config(self, batch_id: int) -> dict:
+        row = db.read_one(self.db_path, "SELECT config FROM ai_batches WHERE id = ?", (batch_id,))
+        return json.loads(row[0]) if row and row[0] else {}
+
+    # Workers
+
+    def heartbeat(self, worker: str):
+        db.write(self.db_path, """
+            INSERT INTO ai_workers (id, heartbeat) VALUES (?, ?)
+            ON CONFLICT(id) DO UPDATE SET heartbeat = excluded.heartbeat
+        """, (worker, time.time()))
+
+    def retire(self, worker: str):
+        db.write(self.db_path, "DELETE FROM ai_workers WHERE id = ?", (worker,))
+
+    def live_workers(self) -> int:
+        row = db.read_one(self.db_path, "SELECT COUNT(*) FROM ai_workers WHERE heartbeat > ?",
+                          (time.time() - WORKER_STALE_SECONDS,))
+        return row[0]
+
+    def claim(self, worker: str, limit: int) -> List[Tuple[int, int, str, List[str]]]:
+        """Take up to limit queued jobs (oldest first) as (job id, batch id, sku, photo hashes)
+
+        Jobs left running by dead workers are requeued first, or failed once
+        they have been claimed MAX_ATTEMPTS times.
+        """
+        now = time.time()
+        with db.transaction(self.db_path) as conn:
+            conn.execute("""
+                UPDATE ai_jobs SET
+                    status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                    error = CASE WHEN attempts >= ? THEN 'Worker stopped while processing (gave up after '
+                                 || attempts || ' attempts)' ELSE error END,
+                    worker = NULL, updated_at = ?
+                WHERE status = 'running'
+                  AND worker NOT IN (SELECT id FROM ai_workers WHERE heartbeat > ?)
+            """, (MAX_ATTEMPTS, MAX_ATTEMPTS, now, now - WORKER_STALE_SECONDS))
+            rows = conn.execute("""
+                SELECT id, batch_id, sku, photos FROM ai_jobs
+                WHERE status = 'queued' ORDER BY id LIMIT ?
+            """, (limit,)).fetchall()
+            conn.executemany("""
+                UPDATE ai_jobs SET status = 'running', worker = ?, attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            """, [(worker, now, row[0]) for row in rows])
+        return [(job_id, batch_id, sku, json.loads(photos or '[]')) for job_id, batch_id, sku, photos in rows]
+
+    def complete(self, job_id: int, result: dict, error: Optional[str] = None):
+        """Store a job's listing; with error the job is marked failed (result is then the placeholder)"""
+        db.write(self.db_path, """
+            UPDATE ai_jobs SET status = ?, result = ?, error = ?, worker = NULL, updated_at = ?
+            WHERE id = ?
+        """, (FAILED if error else DONE, json.dumps(result), error, time.time(), job_id))
+
+    # Progress and results
+
+    def progress(self, batch_id: int) -> Dict[str, int]:
+        """Job counts by status, plus 'total'"""
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(db.read(self.db_path, "SELECT status, COUNT(*) FROM ai_jobs WHERE batch_id = ? GROUP BY status",
+                              (batch_id,)))
+        counts['total'] = sum(counts.values())
+        return counts
+
+    def results(self, batch_id: int) -> Tuple[Dict[str, dict], Dict[str, str]]:
+        """(listings, errors) keyed by SKU, in submission order, for finished jobs"""
+        results, errors = {}, {}
+        rows = db.read(self.db_path, """
+            SELECT sku, result, error FROM ai_jobs
+            WHERE batch_id = ? AND status IN ('done', 'failed') ORDER BY id
+        """, (batch_id,))
+        for sku, result, error in rows:
+            results[sku] = json.loads(result) if result else error_listing(sku, Exception(error))
+            if error:
+                errors[sku] = error
+        return results, errors
+
+    def photo_groups(self, batch_id: int) -> Dict[str, List[str]]:
+        """SKU -> photo hashes as submitted"""
+        rows = db.read(self.db_path, "SELECT sku, photos FROM ai_jobs WHERE batch_id = ? ORDER BY id", (batch_id,))
+        return {sku: json.loads(photos or '[]') for sku, photos in rows}
@@ -0,0 +1,93 @@
+"""
+Incremental JSON field parser for streamed model replies
+Feed text chunks as they arrive; each top-level field of the reply's JSON
+object is decoded as soon as its value is complete
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class JSONFieldStream:
+    """Tracks one top-level JSON object across chunks; `fields` holds the completed ones"""
+
+    def __init__(self):
+        self.text = ""
+        self.fields: Dict[str, Any] = {}
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key: Optional[str] = None
+        self._token_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add text; returns the (key, value) pairs completed by it"""
+        self.text += chunk
+        completed = []
+        text = self.text
+        i = self._pos
+        while i < len(text) and not self.done:
+            ch = text[i]
+            if not self._started:
+                # Skip anything before the object, e.g. a ```json fence
+                if ch == '{':
+                    self._started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._value_start is None:
+                        self._key = json.loads(text[self._token_start:i + 1])
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._token_start = i
+            elif ch == ':' and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = i + 1
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    completed += self._finish_value(text, i)
+                    self.done = True
+            elif ch == ',' and self._depth == 1:
+                completed += self._finish_value(text, i)
+            i += 1
+        self._pos = i
+        return completed
+
+    def _finish_value(self, text: str, end: int) -> List[Tuple[str, Any]]:
+        key, start = self._key, self._value_start
+        self._key = self._value_start = self._token_start = None
+        if key is None or start is None:
+            return []
+        try:
+            value = json.loads(text[start:end])
+        except ValueError:
+            return []
+        self.fields[key] = value
+        return [(key, value)]
+
+
+def stream_text(chunks: Iterable, on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> str:
+    """Drain a streamed generate_content response, reporting (text so far, completed fields)"""
+    parser = JSONFieldStream()
+    for chunk in chunks:
+        try:
+            text = chunk.text
+        except ValueError:
+            # A chunk carrying only finish/safety metadata has no text
+            continue
+        parser.feed(text)
+        if on_progress:
+            on_progress(parser.text, parser.fields)
+    return parser.text
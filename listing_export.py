@@ -0,0 +1,130 @@
+"""
+Listing export - streams listings to CSV in chunks, as a plain table or as
+an eBay File Exchange upload file; memory use doesn't grow with the catalog
+"""
+
+import csv
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, TextIO, Tuple, Union
+
+import pandas as pd
+
+import db
+
+CHUNK_ROWS = 1000
+EXPORT_COLUMNS = ['sku', 'title', 'description', 'price', 'category', 'brand', 'size', 'color', 'condition', 'material']
+
+# File Exchange condition IDs; anything unrecognised is listed as used
+EBAY_CONDITION_IDS = {
+    'new': 1000,
+    'new with tags': 1000,
+    'new without tags': 1500,
+    'new other': 1500,
+    'pre-owned': 3000,
+    'used': 3000,
+    'for parts': 7000,
+}
+EBAY_ACTION_HEADER = '*Action(SiteID=US|Country=US|Currency=USD|Version=1193|CC=UTF-8)'
+
+
+def plain_row(listing: Dict) -> Dict:
+    """Listing fields as stored"""
+    return {column: listing.get(column, '') for column in EXPORT_COLUMNS}
+
+
+def ebay_row(listing: Dict) -> Dict:
+    """One File Exchange "Add" line for a fixed-price, good-'til-cancelled listing"""
+    category = str(listing.get('category') or '')
+    condition = str(listing.get('condition') or '').strip().lower()
+    return {
+        EBAY_ACTION_HEADER: 'Add',
+        'CustomLabel': listing.get('sku', ''),
+        # File Exchange wants a numeric category ID; text categories are left for the seller to map
+        '*Category': category if category.isdigit() else '',
+        '*Title': str(listing.get('title') or '')[:80],
+        '*Description': listing.get('description', ''),
+        '*ConditionID': EBAY_CONDITION_IDS.get(condition, 3000),
+        '*StartPrice': listing.get('price', ''),
+        '*Quantity': 1,
+        '*Format': 'FixedPrice',
+        '*Duration': 'GTC',
+        'C:Brand': listing.get('brand', ''),
+        'C:Size': listing.get('size', ''),
+        'C:Color': listing.get('color', ''),
+        'C:Material': listing.get('material', ''),
+    }
+
+
+LAYOUTS: Dict[str, Tuple[str, Callable[[Dict], Dict]]] = {
+    'csv': ("Plain CSV", plain_row),
+    'ebay': ("eBay File Exchange", ebay_row),
+}
+
+
+def db_listings(db_path: Union[str, Path], chunk_rows: int = CHUNK_ROWS) -> Iterator[Dict]:
+    """Stream the listings table as dicts, chunk_rows at a time"""
+    with db.connect(db_path) as conn:
+        available = {row[1] for row in conn.execute("PRAGMA table_info(listings)")}
+        columns = [column for column in EXPORT_COLUMNS if column in available]
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM listings ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(columns, row))
+
+
+def frame_listings(df: pd.DataFrame) -> Iterator[Dict]:
+    """Rows of a review table (columns named like the listing fields, any case) as dicts"""
+    columns = [str(column).lower() for column in df.columns]
+    for row in df.itertuples(index=False, name=None):
+        yield dict(zip(columns, row))
+
+
+def write_rows(f: TextIO, listings: Iterable[Dict], layout: str = 'csv') -> int:
+    """Write a header and one row per listing to an open text file; returns the number of rows"""
+    to_row = LAYOUTS[layout][1]
+    writer = csv.DictWriter(f, fieldnames=list(to_row({})))
+    writer.writeheader()
+    count = 0
+    for listing in listings:
+        writer.writerow(to_row(listing))
+        count += 1
+    return count
+
+
+def write_csv(listings: Iterable[Dict], path: Union[str, Path], layout: str = 'csv') -> int:
+    """Write listings to path in the given layout; returns the number of rows written"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        count = write_rows(f, listings, layout)
+    tmp_path.replace(path)
+    return count
+
+
+def csv_file(listings: Iterable[Dict], layout: str = 'csv') -> TextIO:
+    """Listings written to an anonymous temporary file, rewound for reading; it is deleted when closed
+
+    For download buttons: nothing is left behind in the exports directory.
+    """
+    f = tempfile.TemporaryFile('w+', newline='', encoding='utf-8')
+    write_rows(f, listings, layout)
+    f.seek(0)
+    return f
+
+
+def export_path(export_dir: Union[str, Path], name: str, layout: str) -> Path:
+    """Timestamped file name for an export"""
+    return Path(export_dir) / f"{name}_{layout}_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+
+
+def export_listings(db_path: Union[str, Path], export_dir: Union[str, Path], layout: str = 'csv',
+                    name: str = 'ebay_listings') -> Tuple[Path, int]:
+    """Export the whole listings table to a new file; returns (path, rows)"""
+    path = export_path(export_dir, name, layout)
+    return path, write_csv(db_listings(db_path), path, layout)
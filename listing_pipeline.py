@@ -0,0 +1,337 @@
+"""
+Listing pipeline - ingestion, prompt building, Gemini calls and the listings writer
+Free of Streamlit so the app, benchmarks and batch jobs share one implementation
+"""
+
+import json
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import google.generativeai as genai
+
+import db
+import feedback_index
+from ai_cache import AIResponseCache, cache_key
+from ai_engine import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RETRIES, DEFAULT_TIMEOUT, run_concurrent
+from edit_tracker import Correction
+from gemini_client import GeminiClients
+from image_pipeline import DEFAULT_MODEL_PRESET, ingest_photos, prepare_model_inputs
+from lru_cache import LRUCache
+from photo_store import PhotoStore
+
+GEMINI_MODEL = 'gemini-1.5-flash'
+DEFAULT_TITLE_FORMULA = '[Brand] [Product_Type] Size [Size] [Color] [Condition]'
+PHOTO_CACHE_ENTRIES = 2000
+MODEL_INPUT_CACHE_ENTRIES = 256
+MAX_PHOTOS_PER_LISTING = 5
+COMPILED_PROMPT_ENTRIES = 32
+
+# Config keys that change the prompt text
+PROMPT_CONFIG_KEYS = ('title_formula', 'pricing_rules')
+
+# Columns of the listings table written from AI results / the review table
+LISTING_FIELDS = ['title', 'description', 'price', 'category', 'material', 'size', 'color', 'condition', 'brand']
+
+
+def fallback_listing(sku: str, description: str, title: Optional[str] = None) -> dict:
+    """Placeholder listing used when the AI can't produce one"""
+    return {
+        'title': title or f'Product {sku}',
+        'description': description,
+        'category': 'General',
+        'price': 0.00,
+        'brand': 'Unknown',
+        'material': 'Unknown',
+        'size': 'N/A',
+        'color': 'Unknown',
+        'condition': 'Used'
+    }
+
+
+def error_listing(sku: str, error: Exception) -> dict:
+    """Placeholder listing recording an AI failure"""
+    return fallback_listing(sku, f'Error processing with AI: {str(error)}', f'Product {sku} - Error')
+
+
+def load_config(data_dir: Union[str, Path]) -> dict:
+    """The app's saved AI settings (data/config.json), or its defaults"""
+    config_file = Path(data_dir) / "config.json"
+    if config_file.exists():
+        with open(config_file, 'r') as f:
+            return json.load(f)
+    return {'title_formula': DEFAULT_TITLE_FORMULA, 'pricing_rules': [], 'gemini_api_key': ''}
+
+
+class ListingPipeline:
+    """Everything between uploaded photos and saved listings, rooted at one data directory"""
+
+    def __init__(self, data_dir: Union[str, Path], genai_module=None,
+                 response_cache: Optional[AIResponseCache] = None):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.feedback_db = self.data_dir / "feedback.db"
+        self.store = PhotoStore(self.data_dir / "photos")
+        self.photo_cache = LRUCache(PHOTO_CACHE_ENTRIES, spill_dir=self.data_dir / "cache" / "photos")
+        self.model_input_cache = LRUCache(MODEL_INPUT_CACHE_ENTRIES, spill_dir=self.data_dir / "cache" / "model_inputs")
+        self.response_cache = response_cache or AIResponseCache(self.data_dir / "ai_cache.db")
+        # Swappable so benchmarks can run against a local stand-in
+        self.genai = genai_module or genai
+        self.clients = GeminiClients(self.genai)
+        # (config fingerprint, product type, feedback version) -> (head, tail) around the SKU
+        self._compiled_prompts: Dict[tuple, Tuple[str, str]] = {}
+
+    def init_database(self):
+        """Initialize SQLite database for feedback"""
+        db.execute_script(self.feedback_db, """
+            -- Feedback table
+            CREATE TABLE IF NOT EXISTS feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                sku TEXT,
+                field_name TEXT,
+                original_value TEXT,
+                corrected_value TEXT,
+                product_type TEXT,
+                context TEXT
+            );
+
+            -- Listings table for saving results
+            CREATE TABLE IF NOT EXISTS listings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sku TEXT UNIQUE,
+                title TEXT,
+                description TEXT,
+                price REAL,
+                category TEXT,
+                material TEXT,
+                size TEXT,
+                color TEXT,
+                condition TEXT,
+                brand TEXT,
+                photos TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        # Databases from before per-SKU feedback lack the sku column; their old
+        # rows keep sku NULL, which the unique index treats as distinct
+        feedback_columns = {row[1] for row in db.read(self.feedback_db, "PRAGMA table_info(feedback)")}
+        if 'sku' not in feedback_columns:
+            db.write(self.feedback_db, "ALTER TABLE feedback ADD COLUMN sku TEXT")
+        db.execute_script(self.feedback_db, """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_feedback_sku_field ON feedback(sku, field_name);
+            CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback(timestamp);
+        """)
+        feedback_index.init_index(self.feedback_db)
+
+        # Dashboard counts, maintained on write instead of COUNT(*) per rerun
+        db.execute_script(self.feedback_db, db.counter_schema('listings'))
+        db.execute_script(self.feedback_db, db.counter_schema('feedback'))
+
+    def counts(self) -> Dict[str, int]:
+        """Row counts of the listings and feedback tables"""
+        counts = db.row_counts(self.feedback_db)
+        return {'listings': counts.get('listings', 0), 'feedback': counts.get('feedback', 0)}
+
+    def ingest(self, uploads, max_workers: Optional[int] = None) -> List[Dict]:
+        """Store, dedupe and thumbnail uploaded files; returns lightweight photo records"""
+        return ingest_photos(uploads, self.store, self.photo_cache, max_workers)
+
+    def build_prompt(self, sku: str, config: dict, product_type: Optional[str] = None) -> str:
+        """Generate AI prompt with user-defined rules and feedback"""
+        head, tail = self.compile_prompt(config, product_type)
+        return head + sku + tail
+
+    def compile_prompt(self, config: dict, product_type: Optional[str] = None) -> Tuple[str, str]:
+        """Prompt text before and after the SKU, rebuilt only when config or feedback changes"""
+        product_type = product_type or config.get('product_type')
+        settings = {key: config.get(key) for key in PROMPT_CONFIG_KEYS}
+        key = (
+            json.dumps(settings, sort_keys=True, default=str),
+            product_type,
+            feedback_index.feedback_version(self.feedback_db)
+        )
+        compiled = self._compiled_prompts.get(key)
+        if compiled is None:
+            compiled = self._render_prompt(config, product_type)
+            if len(self._compiled_prompts) >= COMPILED_PROMPT_ENTRIES:
+                self._compiled_prompts.clear()
+            self._compiled_prompts[key] = compiled
+        return compiled
+
+    def _render_prompt(self, config: dict, product_type: Optional[str]) -> Tuple[str, str]:
+        # Most frequent corrections, preferring ones for this product type when it is known
+        feedback_examples = feedback_index.relevant_feedback(self.feedback_db, product_type)
+
+        # Build feedback section
+        feedback_text = ""
+        if feedback_examples:
+            feedback_text = "\n\nLEARN FROM THESE CORRECTIONS:\n"
+            for field, original, corrected, example_type, weight in feedback_examples:
+                repeated = f" ({weight} times)" if weight > 1 else ""
+                feedback_text += (
+                    f"- For {example_type or 'any product'}, when {field} was '{original}', "
+                    f"user corrected to '{corrected}'{repeated}\n"
+                )
+
+        # Build pricing rules
+        pricing_text = "\n\nPRICING RULES:\n"
+        for rule in config.get('pricing_rules', []):
+            pricing_text += f"- If {rule['condition']}, set price to ${rule['price']}\n"
+
+        head = """You are an expert eBay listing creator. Analyze these product images and create a professional listing.
+
+SKU: """
+        tail = f"""
+
+TITLE FORMULA: {config.get('title_formula', DEFAULT_TITLE_FORMULA)}
+{pricing_text}
+{feedback_text}
+
+Analyze the images and provide the following in JSON format:
+{{
+    "title": "Professional eBay title following the formula",
+    "description": "Detailed product description (3-4 paragraphs)",
+    "category": "Most specific eBay category",
+    "price": 0.00,
+    "brand": "Brand name or 'Unbranded'",
+    "product_type": "Specific product type",
+    "material": "Primary material",
+    "size": "Size or 'N/A'",
+    "color": "Primary color",
+    "condition": "New/Used/Pre-owned",
+    "features": ["feature1", "feature2", "feature3"],
+    "item_specifics": {{"key": "value"}}
+}}
+
+Be specific and accurate. Use the title formula exactly."""
+
+        return head, tail
+
+    def request_listing(self, sku: str, photos: List[dict], config: dict,
+                        prompt_parts: Optional[Tuple[str, str]] = None) -> dict:
+        """Call Gemini for one product group; API errors propagate so callers can retry
+
+        Safe to run in worker threads. prompt_parts is a prompt compiled for the
+        whole batch (see compile_prompt); without it the prompt is looked up here.
+        """
+        if not config.get('gemini_api_key'):
+            return fallback_listing(sku, 'AI processing requires Gemini API key. Please configure in AI Settings.')
+
+        photo_hashes = [photo['hash'] for photo in photos[:MAX_PHOTOS_PER_LISTING]]
+
+        # Generate prompt
+        head, tail = prompt_parts or self.compile_prompt(config)
+        prompt = head + sku + tail
+
+        # Same photos + same prompt + same model = same answer; skip the API call
+        key = cache_key(photo_hashes, prompt, GEMINI_MODEL)
+        if not config.get('ai_cache_bypass'):
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Warm model for this key (no process-global configure)
+        model = self.clients.model(config['gemini_api_key'], GEMINI_MODEL)
+
+        # Prepare images (downscaled per the configured preset)
+        image_parts = prepare_model_inputs(
+            photo_hashes,
+            self.store,
+            self.model_input_cache,
+            config.get('model_image_preset', DEFAULT_MODEL_PRESET)
+        )
+
+        # Get AI response
+        response = model.generate_content([prompt] + image_parts)
+
+        # Parse JSON response
+        try:
+            result = json.loads(response.text)
+        except ValueError:
+            # Fallback if JSON parsing fails (not cached, so a retry can do better)
+            return fallback_listing(sku, response.text[:500])
+
+        self.response_cache.put(key, result, GEMINI_MODEL)
+        return result
+
+    def process_groups(self, tasks: List[Tuple[str, List[dict]]], config: dict,
+                       on_result: Optional[Callable[[int, dict, int], None]] = None,
+                       on_error: Optional[Callable[[str, str], None]] = None) -> Tuple[dict, dict]:
+        """Run (sku, photos) tasks through Gemini concurrently; returns (results, errors) keyed by SKU
+
+        on_error(sku, message) is called for a failed group just before its
+        placeholder listing is passed to on_result.
+        """
+        errors = {}
+        # Only the SKU line differs within a batch
+        prompt_parts = self.compile_prompt(config)
+
+        def on_failure(task, error):
+            errors[task[0]] = str(error)
+            if on_error:
+                on_error(task[0], str(error))
+            return error_listing(task[0], error)
+
+        listings = run_concurrent(
+            tasks,
+            lambda task: self.request_listing(task[0], task[1], config, prompt_parts),
+            max_in_flight=config.get('max_concurrent_requests', DEFAULT_MAX_IN_FLIGHT),
+            timeout=config.get('request_timeout', DEFAULT_TIMEOUT),
+            retries=config.get('request_retries', DEFAULT_RETRIES),
+            fallback=on_failure,
+            on_result=on_result
+        )
+
+        return {sku: listing for (sku, _), listing in zip(tasks, listings)}, errors
+
+    def record_feedback(self, corrections: List[Correction], reverted: Iterable[Tuple[str, str, str]] = ()) -> int:
+        """Upsert corrections (one row per SKU and field, latest value wins) and drop reverted ones
+
+        A reverted (sku, field, value) only deletes the row while it still holds that
+        value, so a newer correction from another batch or session is kept.
+        Everything is written in one transaction; returns the number of corrections written.
+        """
+        with db.transaction(self.feedback_db) as conn:
+            conn.executemany("""
+                INSERT INTO feedback (sku, field_name, original_value, corrected_value, product_type)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(sku, field_name) DO UPDATE SET
+                    original_value = excluded.original_value,
+                    corrected_value = excluded.corrected_value,
+                    product_type = excluded.product_type,
+                    timestamp = CURRENT_TIMESTAMP
+                WHERE corrected_value IS NOT excluded.corrected_value
+                   OR original_value IS NOT excluded.original_value
+            """, corrections)
+            conn.executemany("DELETE FROM feedback WHERE sku = ? AND field_name = ? AND corrected_value = ?",
+                             reverted)
+        return len(corrections)
+
+    def save_listings(self, listings: Iterable[dict], photo_groups: Dict[str, List[str]]) -> int:
+        """Upsert listings (dicts with 'sku' plus LISTING_FIELDS) into the listings table in one transaction"""
+        rows = [
+            (
+                listing['sku'], listing.get('title'), listing.get('description'), listing.get('price'),
+                listing.get('category'), listing.get('material'), listing.get('size'),
+                listing.get('color'), listing.get('condition'), listing.get('brand'),
+                json.dumps(photo_groups.get(listing['sku'], []))
+            )
+            for listing in listings
+        ]
+        db.write_many(self.feedback_db, """
+            INSERT INTO listings
+            (sku, title, description, price, category, material, size, color, condition, brand, photos)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(sku) DO UPDATE SET
+                title = excluded.title,
+                description = excluded.description,
+                price = excluded.price,
+                category = excluded.category,
+                material = excluded.material,
+                size = excluded.size,
+                color = excluded.color,
+                condition = excluded.condition,
+                brand = excluded.brand,
+                photos = excluded.photos
+        """, rows)
+        return len(rows)
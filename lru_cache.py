@@ -0,0 +1,191 @@
+"""
+Bounded, thread-safe LRU cache with optional, size-capped disk spill
+Used to make Streamlit reruns cheap: entries are keyed by content hash
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Union
+
+DEFAULT_MAX_SPILL_BYTES = 256 * 1024 * 1024
+
+
+class LRUCache:
+    """In-memory LRU; evicted entries are pickled to spill_dir when one is given
+
+    Spill files are kept under max_spill_bytes, least recently used first out.
+    A directory shared by several processes is trimmed by each of them
+    against the files it has seen (those present at start plus its own).
+    """
+
+    def __init__(self, max_entries: int = 1024, spill_dir: Optional[Union[str, Path]] = None,
+                 max_spill_bytes: int = DEFAULT_MAX_SPILL_BYTES):
+        self.max_entries = max_entries
+        self.max_spill_bytes = max_spill_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        # Spill file name -> size in bytes, least recently used first
+        self._spilled: "OrderedDict[str, int]" = OrderedDict()
+        self.spill_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self.evictions = 0
+
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._index_spill_dir()
+
+    def _spill_path(self, key: Hashable) -> Path:
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return self.spill_dir / f"{name}.pkl"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value, promoting it to most recently used"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = self._load_spilled(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return default
+
+        with self._lock:
+            self.hits += 1
+            self.spill_hits += 1
+        self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Insert or refresh a value, evicting the least recently used if full"""
+        evicted = []
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+                self.evictions += 1
+
+        # Disk writes happen outside the lock so readers are never blocked on I/O
+        for old_key, old_value in evicted:
+            self._spill(old_key, old_value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.spill_dir) and self._spill_path(key).exists()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """Drop every entry, including spill files"""
+        with self._lock:
+            self._entries.clear()
+            names = list(self._spilled)
+        self._remove_spilled(names)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for display: hit rate, evictions, current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'spill_hits': self.spill_hits,
+                'evictions': self.evictions,
+                'spill_files': len(self._spilled),
+                'spill_bytes': self.spill_bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _index_spill_dir(self):
+        """Account for spill files left by earlier runs, oldest first, and trim to the cap"""
+        files = []
+        for path in self.spill_dir.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        with self._lock:
+            for _, name, size in sorted(files):
+                self._spilled[name] = size
+                self.spill_bytes += size
+        self._remove_spilled(self._over_cap())
+
+    def _over_cap(self) -> List[str]:
+        """Least recently used spill files to delete to get back under max_spill_bytes"""
+        with self._lock:
+            victims = []
+            remaining = self.spill_bytes
+            for name, size in self._spilled.items():
+                if remaining <= self.max_spill_bytes:
+                    break
+                victims.append(name)
+                remaining -= size
+            return victims
+
+    def _remove_spilled(self, names: List[str]):
+        for name in names:
+            with self._lock:
+                self.spill_bytes -= self._spilled.pop(name, 0)
+            try:
+                (self.spill_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _spill(self, key: Hashable, value: Any):
+        if not self.spill_dir:
+            return
+        path = self._spill_path(key)
+        if path.exists():
+            with self._lock:
+                if path.name in self._spilled:
+                    self._spilled.move_to_end(path.name)
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except Exception:
+            # Spilling is best effort - losing an entry only costs a recompute
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        with self._lock:
+            self.spill_bytes += size - self._spilled.pop(path.name, 0)
+            self._spilled[path.name] = size
+        self._remove_spilled(self._over_cap())
+
+    def _load_spilled(self, key: Hashable) -> Any:
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if stored_key != key:
+            return None
+        with self._lock:
+            if path.name in self._spilled:
+                self._spilled.move_to_end(path.name)
+        return value
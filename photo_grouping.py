@@ -0,0 +1,93 @@
+"""
+Perceptual hashing and automatic SKU group suggestions
+dHash is computed from the thumbnail during ingestion; grouping clusters
+the batch by Hamming distance using bit-packed NumPy arrays
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+# Max differing bits (out of 64) for two photos to be proposed as the same item
+GROUPING_THRESHOLD = 8
+BLOCK_ROWS = 1024
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        as_bytes = values.view(np.uint8).reshape(values.shape + (8,))
+        return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+def dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """64-bit difference hash: brightness gradient between horizontally adjacent pixels"""
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(np.packbits(bits, bitorder='big').view('>u8')[0])
+
+
+def hamming_pairs(hashes: np.ndarray, threshold: int = GROUPING_THRESHOLD,
+                  block_rows: int = BLOCK_ROWS):
+    """Index pairs (i < j) whose hashes differ in at most `threshold` bits"""
+    n = len(hashes)
+    left, right = [], []
+    # Blocks of rows against the rest of the batch keep memory bounded
+    # (block_rows x n distances) while every comparison stays vectorized
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        distances = _popcount(hashes[start:stop, None] ^ hashes[None, start:])
+        rows, cols = np.nonzero(distances <= threshold)
+        cols = cols + start
+        rows = rows + start
+        upper = cols > rows
+        left.append(rows[upper])
+        right.append(cols[upper])
+
+    if not left:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def connected_components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Component label (smallest member index) for each of n nodes"""
+    labels = np.arange(n)
+    if len(left) == 0:
+        return labels
+
+    while True:
+        edge_min = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, edge_min)
+        np.minimum.at(updated, right, edge_min)
+        # Pointer jumping: follow labels to their own labels to converge quickly
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def suggest_groups(hashes: Sequence[Optional[int]], threshold: int = GROUPING_THRESHOLD) -> List[List[int]]:
+    """Cluster photos by perceptual hash; returns index groups of 2+ photos in batch order
+
+    Photos without a hash are never grouped.
+    """
+    indices = [idx for idx, value in enumerate(hashes) if value is not None]
+    if len(indices) < 2:
+        return []
+
+    packed = np.array([hashes[idx] for idx in indices], dtype=np.uint64)
+    left, right = hamming_pairs(packed, threshold)
+    labels = connected_components(len(packed), left, right)
+
+    groups = {}
+    for position, label in enumerate(labels.tolist()):
+        groups.setdefault(label, []).append(indices[position])
+
+    return sorted((members for members in groups.values() if len(members) > 1), key=lambda g: g[0])
@@ -0,0 +1,68 @@
+"""
+Photo registry - the current batch's photos and SKU assignment state
+Every lookup is by hash through dicts, so pages stay linear in batch size
+"""
+
+from typing import Dict, Iterable, List
+
+
+class PhotoRegistry:
+    """hash -> record map with an ordered unassigned set and SKU groups"""
+
+    def __init__(self, photos: Iterable[Dict] = ()):
+        self._records: Dict[str, Dict] = {}
+        self._position: Dict[str, int] = {}
+        # dict keys double as an insertion-ordered set: O(1) membership and removal
+        self._unassigned: Dict[str, None] = {}
+        self.groups: Dict[str, List[str]] = {}
+        self.add(photos)
+
+    def add(self, photos: Iterable[Dict]):
+        """Register photos as unassigned; already-known hashes are ignored"""
+        for photo in photos:
+            if photo['hash'] in self._records:
+                continue
+            self._position[photo['hash']] = len(self._records)
+            self._records[photo['hash']] = photo
+            self._unassigned[photo['hash']] = None
+
+    def reset(self, photos: Iterable[Dict] = ()):
+        """Start a new batch"""
+        self._records.clear()
+        self._position.clear()
+        self._unassigned.clear()
+        self.groups.clear()
+        self.add(photos)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def hashes(self) -> List[str]:
+        """All hashes in upload order"""
+        return list(self._records)
+
+    def records(self, photo_hashes: Iterable[str]) -> List[Dict]:
+        """Records for the given hashes, in the given order, skipping unknown ones"""
+        return [self._records[h] for h in photo_hashes if h in self._records]
+
+    @property
+    def unassigned_count(self) -> int:
+        return len(self._unassigned)
+
+    @property
+    def assigned_count(self) -> int:
+        return len(self._records) - len(self._unassigned)
+
+    def unassigned(self) -> List[Dict]:
+        """Unassigned records in upload order"""
+        return [self._records[h] for h in self._unassigned]
+
+    def assign(self, sku: str, photo_hashes: Iterable[str]) -> List[str]:
+        """Assign unassigned photos to a SKU group in upload order; returns the hashes assigned"""
+        assigned = [h for h in set(photo_hashes) if h in self._unassigned]
+        assigned.sort(key=self._position.__getitem__)
+        for photo_hash in assigned:
+            del self._unassigned[photo_hash]
+            self._records[photo_hash]['assigned'] = True
+        self.groups.setdefault(sku, []).extend(assigned)
+        return assigned
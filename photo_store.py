@@ -0,0 +1,111 @@
+"""
+Content-addressed photo store - blobs on disk under data/, keyed by photo hash
+Session state keeps only the hash; bytes are read back through memory maps
+"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Union
+
+ORIGINAL = 'original'
+THUMBNAIL = 'thumb'
+
+_SUFFIXES = {
+    ORIGINAL: '',
+    THUMBNAIL: '.thumb.jpg',
+}
+
+# Full 256-bit BLAKE2b: faster than MD5 on 64-bit CPUs and collision-safe
+# at any batch size (the old IDs were MD5 truncated to 48 bits)
+HASH_DIGEST_SIZE = 32
+STREAM_CHUNK_SIZE = 1 << 20
+
+
+def new_hasher():
+    """Incremental hasher for photo content"""
+    return hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+
+
+def content_hash(data: bytes) -> str:
+    """Hex digest identifying a photo by its content"""
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+class PhotoStore:
+    """Write-once blob store laid out as <root>/<hash[:2]>/<hash><suffix>"""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str, kind: str = ORIGINAL) -> Path:
+        """Location of a blob, whether or not it exists yet"""
+        return self.root / digest[:2] / f"{digest}{_SUFFIXES[kind]}"
+
+    def has(self, digest: str, kind: str = ORIGINAL) -> bool:
+        """Check whether a blob is already stored"""
+        return self.path(digest, kind).exists()
+
+    def put(self, digest: str, data: bytes, kind: str = ORIGINAL) -> Path:
+        """Store a blob once; identical content is never written twice"""
+        target = self.path(digest, kind)
+        if target.exists():
+            return target
+
+        target.parent.mkdir(exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return target
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        """Stream an upload into the store, hashing as it is written; returns its hash"""
+        hasher = new_hasher()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    f.write(chunk)
+
+            digest = hasher.hexdigest()
+            target = self.path(digest)
+            if target.exists():
+                # Exact duplicate of something already stored
+                os.unlink(tmp_path)
+            else:
+                target.parent.mkdir(exist_ok=True)
+                os.replace(tmp_path, target)
+            return digest
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @contextmanager
+    def mapped(self, digest: str, kind: str = ORIGINAL) -> Iterator[mmap.mmap]:
+        """Memory-map a blob read-only; the map is only valid inside the block"""
+        with open(self.path(digest, kind), 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+    def read(self, digest: str, kind: str = ORIGINAL) -> bytes:
+        """Copy a blob into memory - prefer mapped() for large originals"""
+        with self.mapped(digest, kind) as mm:
+            return mm[:]